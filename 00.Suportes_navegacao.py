@@ -1,8 +1,12 @@
-import threading
+import asyncio
 import time
+from collections import Counter
+from functools import lru_cache
+from operator import itemgetter
 
 import pythoncom
 import win32com.client
+from win32com.client import gencache
 
 import flet as ft
 
@@ -16,17 +20,31 @@ def aDouble(xyz):
 def aDispatch(vObject):
     return win32com.client.VARIANT(pythoncom.VT_ARRAY | pythoncom.VT_DISPATCH, vObject)
 
+def aShort(valores):
+    return win32com.client.VARIANT(pythoncom.VT_ARRAY | pythoncom.VT_I2, (valores))
+
+def aVariant(valores):
+    return win32com.client.VARIANT(pythoncom.VT_ARRAY | pythoncom.VT_VARIANT, (valores))
+
+def as_block_reference(entity):
+    # Com early binding a coleção devolve IAcadEntity; o cast expõe as
+    # propriedades de bloco (HasAttributes, IsDynamicBlock, ...) com DISPIDs fixos
+    return win32com.client.CastTo(entity, "IAcadBlockReference")
+
 def inicializar_acad():
     global acad, acadDoc, acadModel
 
+    # Early binding (makepy): os wrappers são gerados no primeiro uso e ficam em
+    # cache; para gerá-los antes: python -m win32com.client.makepy "AutoCAD.Application"
     acad = None
     try:
         # Tentativa para conectar ao AutoCAD já aberto
-        acad = win32com.client.GetActiveObject("AutoCAD.Application")
+        acad = gencache.EnsureDispatch(win32com.client.GetActiveObject("AutoCAD.Application"))
     except Exception as e:
         # Se não conseguir, tenta inicializar uma nova instância
         try:
-            acad = win32com.client.dynamic.Dispatch("AutoCAD.Application", pythoncom.CoInitialize())
+            pythoncom.CoInitialize()
+            acad = gencache.EnsureDispatch("AutoCAD.Application")
         except Exception as e:
             print(f"Erro ao conectar ao AutoCAD: {e}")
             return None, None, None
@@ -47,33 +65,159 @@ def inicializar_acad():
 
 acad, acadDoc, acadModel = inicializar_acad()
 
+def ensure_acad():
+    # Reaproveita a conexão se ainda estiver viva e o documento ativo for o mesmo;
+    # só reconecta em caso de falha ou troca de documento
+    try:
+        if acad is not None and acad.Documents.Count > 0 and acad.ActiveDocument.Name == acadDoc.Name:
+            return acad, acadDoc, acadModel
+    except Exception:
+        pass
+    # Handles são por documento: o cache de POSICAO não vale para a nova conexão
+    posicao_attribs.clear()
+    return inicializar_acad()
+
+# Snapshot do ModelSpace: {handle: entity} e lista de blocos de suporte
+# (handle, tag, tipo, insertion_point, is_dynamic, has_attribs).
+# Reconstruído apenas em listarSuportes (botão "Buscar").
+model_index = {}
+model_snapshot = []
+# {handle: atributo POSICAO (ou None)} mantido entre buscas; limpo pelo botão
+# "Forçar releitura", na troca de documento e quando a referência fica inválida
+posicao_attribs = {}
+
+SELECTION_SET_NOME = "suportes"
+AC_SELECTION_SET_ALL = 5
+CAMPOS_BUSCA = {"nomeSuporte": 'tag', "tipoSuporte": 'tipo'}
+
+def selecionar_inserts(acadDoc, com_atributos=False):
+    # Remove seleção anterior com o mesmo nome (ex.: execução interrompida)
+    try:
+        acadDoc.SelectionSets.Item(SELECTION_SET_NOME).Delete()
+    except Exception:
+        pass
+    ss = acadDoc.SelectionSets.Add(SELECTION_SET_NOME)
+    # Filtro DXF: 0 = tipo da entidade (INSERT), 67 = 0 -> apenas ModelSpace
+    codigos, valores = [0, 67], ["INSERT", 0]
+    if com_atributos:
+        # 66 = 1 -> "attributes follow": blocos sem atributos nem chegam ao Python
+        codigos.append(66)
+        valores.append(1)
+    ss.Select(AC_SELECTION_SET_ALL, pythoncom.Empty, pythoncom.Empty,
+              aShort(codigos), aVariant(valores))
+    return ss
+
+def posicao_attrib(entity, handle):
+    # GetAttributes() devolve um SAFEARRAY de objetos COM: só é chamado na
+    # primeira vez que o handle aparece
+    if handle not in posicao_attribs:
+        posicao_attribs[handle] = next(
+            (attrib for attrib in entity.GetAttributes() if attrib.TagString == 'POSICAO'), None
+        )
+    return posicao_attribs[handle]
+
+def ler_posicao(entity, handle):
+    attrib = posicao_attrib(entity, handle)
+    if attrib is None:
+        return None
+    try:
+        return attrib.TextString, attrib.InsertionPoint
+    except Exception:
+        # Atributo apagado ou bloco redefinido: descarta a referência e relê
+        posicao_attribs.pop(handle, None)
+        attrib = posicao_attrib(entity, handle)
+        return None if attrib is None else (attrib.TextString, attrib.InsertionPoint)
+
+def indexar_model(acadDoc, texto="", opcao="nomeSuporte"):
+    # O texto do "Buscar" é aplicado durante a passada COM: blocos descartados
+    # não geram tuplas nem linhas, e o filtro por tipo evita até o GetAttributes()
+    busca = (texto or "").lower()
+    filtra_tipo = bool(busca) and CAMPOS_BUSCA.get(opcao) == 'tipo'
+    filtra_tag = bool(busca) and not filtra_tipo
+    dyn_props.cache_clear()
+    model_index.clear()
+    model_snapshot.clear()
+    ss = selecionar_inserts(acadDoc, com_atributos=True)
+    try:
+        # O filtro já garante AcDbBlockReference com atributos: dispensa os
+        # testes de EntityName e HasAttributes
+        for entity in ss:
+            entity = as_block_reference(entity)
+            handle = entity.Handle
+            model_index[handle] = entity
+            tipo = entity.Name
+            if filtra_tipo and busca not in tipo.lower():
+                continue
+            is_dynamic = entity.IsDynamicBlock
+            posicao = ler_posicao(entity, handle)
+            if posicao is None:
+                continue
+            tag, (x, y, z) = posicao
+            if filtra_tag and busca not in tag.lower():
+                continue
+            model_snapshot.append((handle, tag, tipo, (x, y, z), is_dynamic, True))
+    finally:
+        ss.Delete()
+    # Handles que saíram do desenho não ficam presos no cache
+    for handle in posicao_attribs.keys() - model_index.keys():
+        del posicao_attribs[handle]
+
+@lru_cache(maxsize=512)
+def dyn_props(handle):
+    # {nome: propriedade COM} por handle; invalidado na escrita e no "Buscar"
+    entity = model_index.get(handle)
+    if entity is None:
+        return {}
+    return {prop.PropertyName: prop for prop in entity.GetDynamicBlockProperties()}
+
+def enumerar_suportes(acadDoc, texto="", opcao="nomeSuporte"):
+    # Ponto único de enumeração: devolve tuplas planas (tag, tipo, x, y, z, handle)
+    indexar_model(acadDoc, texto, opcao)
+    return [(tag, tipo, x, y, z, handle) for handle, tag, tipo, (x, y, z), _, _ in model_snapshot]
+
+def ordenar_suportes(suportes):
+    # Ordena as tuplas (tag, tipo, x, y, z, handle) por tag; sorted é estável e
+    # compara as strings direto, sem copiar os textos para um array intermediário
+    return sorted(suportes, key=itemgetter(0))
+
 def contar_valores(lista):
-    contagem = {}
-    for valor in lista:
-        contagem[valor] = contagem.get(valor, 0) + 1
-    return contagem
+    return Counter(lista)
 
 def modificar_atributos_bloco(acadDoc, acadModel):
     print('Quantidade de Blocos:', acadDoc.Blocks.Count)
 
-    for entity in acadModel:
-        if entity.EntityName == 'AcDbBlockReference':
-            if entity.HasAttributes:
+    ss = selecionar_inserts(acadDoc)
+    try:
+        # Entidades materializadas uma vez; cada propriedade COM é lida uma única
+        # vez por iteração e os desvios usam as variáveis locais
+        for entity in [as_block_reference(item) for item in ss]:
+            has_attribs = entity.HasAttributes
+            is_dynamic = entity.IsDynamicBlock
+            if has_attribs:
                 print(f'Nome: {entity.Name}, Layer: {entity.Layer}, Object ID: {entity.ObjectID}')
                 for attrib in entity.GetAttributes():
-                    print(f"Atributo {attrib.TagString}: {attrib.TextString}")
-                    if attrib.TagString == 'Title':
+                    tag = attrib.TagString
+                    print(f"Atributo {tag}: {attrib.TextString}")
+                    if tag == 'Title':
                         attrib.TextString = 'Modified Title'
                     attrib.Update()
-            if entity.IsDynamicBlock:
+            if is_dynamic:
                 for dyn_prop in entity.GetDynamicBlockProperties():
-                    print(f'Dynamic Property: {dyn_prop.PropertyName} = {dyn_prop.Value}')
-                    if dyn_prop.PropertyName == 'MEDIDA H':
+                    nome_prop = dyn_prop.PropertyName
+                    print(f'Dynamic Property: {nome_prop} = {dyn_prop.Value}')
+                    if nome_prop == 'MEDIDA H':
                         dyn_prop.Value = 237
                 print('Bloco dinâmico modificado.')
+    finally:
+        ss.Delete()
 
     acad.ZoomExtents()
 
+_CELL_WIDTHS = (140, 160, 120, 120, 100, 80)
+
+def cell(text, w):
+    return ft.DataCell(ft.Container(ft.Text(text), width=w))
+
 def zoom_center(acad, x, y, z):
     p1 = APoint(x-200, y+200, z)
     p2 = APoint(x+200, y-200, z)
@@ -107,7 +251,8 @@ def main(page: ft.Page):
 
     def zoom_to_block(e):
         bloco = e.control.data
-        pos_x, pos_y, pos_z = float(bloco['Posicao X']), float(bloco['Posicao Y']), float(bloco['Posicao Z'])
+        # Coordenadas já armazenadas como float em listarSuportes
+        pos_x, pos_y, pos_z = bloco['Posicao X'], bloco['Posicao Y'], bloco['Posicao Z']
         zoom_center(acad, pos_x, pos_y, pos_z)
         highlight_row(e.control.parent.parent.parent)
         page.update()
@@ -122,30 +267,31 @@ def main(page: ft.Page):
 
     def listarPropriedades(e):
         handle = e.control.data['Handle']
-        bloco_propriedades = {
-            prop.PropertyName: prop.Value for entity in acadModel
-            if entity.EntityName == 'AcDbBlockReference' and entity.Handle == handle
-            for prop in entity.GetDynamicBlockProperties() if prop.PropertyName != "Origin"
-        }
-        popula_dt_blocos_valores(dict(sorted(bloco_propriedades.items())), handle)
+        bloco_propriedades = sorted(
+            ((nome, prop.Value) for nome, prop in dyn_props(handle).items() if nome != "Origin"),
+            key=lambda item: item[0]
+        )
+        popula_dt_blocos_valores(bloco_propriedades, handle)
         highlight_row(e.control.parent.parent.parent)
         container_dt_blocos_valores.visible = True
         page.update()
 
     def popula_dt_blocos_valores(bloco_propriedades, handle):
-        dt_blocos_valores.rows.clear()
-        for atributo, valor in bloco_propriedades.items():
+        # Linhas montadas fora da árvore e atribuídas de uma vez; o page.update()
+        # fica a cargo de listarPropriedades (um único envio ao renderer)
+        novas_linhas = []
+        for atributo, valor in bloco_propriedades:
             text_field = ft.TextField(label="Novo Valor", value="", visible=False, width=120)
             button_ok = ft.IconButton(
                 icon=ft.Icons.CHECK_CIRCLE_ROUNDED, visible=False,
-                data={'Atributo': atributo, 'Handle': handle, 'NovoValor': ""},
-                on_click=lambda e, text_field=text_field: atualiza_valor_text_field(e, text_field)
+                data={'Atributo': atributo, 'Handle': handle, 'NovoValor': "", 'text_field_ref': text_field},
+                on_click=atualiza_valor_text_field
             )
-            dt_blocos_valores.rows.append(
+            novas_linhas.append(
                 ft.DataRow(cells=[
-                    ft.DataCell(ft.Text(str(atributo))),
-                    ft.DataCell(ft.Text(str(valor))),
-                    ft.DataCell(ft.Text(str(handle))),
+                    ft.DataCell(ft.Text(atributo)),
+                    ft.DataCell(ft.Text(valor if isinstance(valor, str) else str(valor))),
+                    ft.DataCell(ft.Text(handle)),
                     ft.DataCell(ft.Container(
                         ft.Row([
                             ft.IconButton(icon=ft.Icons.EDIT, icon_color="green",
@@ -157,73 +303,67 @@ def main(page: ft.Page):
                     )),
                 ])
             )
-        page.update()
+        dt_blocos_valores.rows = novas_linhas
 
-    def atualiza_valor_text_field(e, text_field):
-        e.control.data["NovoValor"] = text_field.value
+    def atualiza_valor_text_field(e):
+        e.control.data["NovoValor"] = e.control.data["text_field_ref"].value
         atualiza_valor_propriedade(e)
 
     def atualiza_valor_propriedade(e):
         dados = e.control.data
         handle, nome_propriedade, novoValor = dados['Handle'], dados['Atributo'], float(dados['NovoValor'])
-        for entity in acadModel:
-            if entity.EntityName == 'AcDbBlockReference' and entity.Handle == handle:
-                for prop in entity.GetDynamicBlockProperties():
-                    if prop.PropertyName == nome_propriedade:
-                        try:
-                            if hasattr(prop, 'ValueMinimum') and hasattr(prop, 'ValueMaximum'):
-                                if prop.ValueMinimum <= novoValor <= prop.ValueMaximum:
-                                    prop.Value = float(novoValor)
-                                    print(f"Novo valor de '{nome_propriedade}': {prop.Value}")
-                                else:
-                                    print("O valor desejado está fora dos limites permitidos.")
-                            else:
-                                prop.Value = float(novoValor)
-                                print(f"Novo valor de '{nome_propriedade}': {prop.Value}")
-                        except Exception as erro:
-                            print(f"Erro ao tentar alterar o valor: {erro}")
+        prop = dyn_props(handle).get(nome_propriedade)
+        if prop is not None:
+            try:
+                if hasattr(prop, 'ValueMinimum') and hasattr(prop, 'ValueMaximum'):
+                    if prop.ValueMinimum <= novoValor <= prop.ValueMaximum:
+                        prop.Value = float(novoValor)
+                        print(f"Novo valor de '{nome_propriedade}': {prop.Value}")
+                    else:
+                        print("O valor desejado está fora dos limites permitidos.")
+                else:
+                    prop.Value = float(novoValor)
+                    print(f"Novo valor de '{nome_propriedade}': {prop.Value}")
+            except Exception as erro:
+                print(f"Erro ao tentar alterar o valor: {erro}")
+            # Alterar um parâmetro pode mudar outras propriedades do bloco dinâmico
+            dyn_props.cache_clear()
         mensagemPop("Valor atualizado com sucesso!", 20, ft.Colors.GREEN)
-        threading.Thread(target=hide_container_after_delay).start()
+        page.run_task(hide_container_after_delay)
+
+    def make_row(tag, tipo, pos_x, pos_y, pos_z, handle):
+        # tag/tipo/handle já chegam como str do COM; coordenadas com 3 casas
+        # encurtam o texto enviado ao renderer a cada atualização
+        textos = (tag, tipo, f"{pos_x:.3f}", f"{pos_y:.3f}", f"{pos_z:.3f}", handle)
+        return ft.DataRow(cells=[
+            *[cell(texto, largura) for texto, largura in zip(textos, _CELL_WIDTHS)],
+            ft.DataCell(ft.Row([
+                ft.IconButton(icon=ft.Icons.ZOOM_IN, icon_color="red",
+                              data={'Nome': tag, 'Posicao X': pos_x, 'Posicao Y': pos_y, 'Posicao Z': pos_z},
+                              on_click=zoom_to_block),
+                ft.IconButton(icon=ft.Icons.INFO_OUTLINE, icon_color="blue",
+                              data={'Handle': handle}, on_click=listarPropriedades),
+            ])),
+        ])
 
     def listarSuportes(e=None):
-        acad, acadDoc, acadModel = inicializar_acad()
+        acad, acadDoc, acadModel = ensure_acad()
         if acadDoc is not None and acadModel is not None:
             print("AutoCAD inicializado com sucesso!")
             print('Quantidade de Blocos:', acadDoc.Blocks.Count)
         else:
             print("Não foi possível inicializar o AutoCAD ou obter um documento ativo.")
 
-        mydt.rows.clear()
-        valores_blocos = [
-            {
-                'Tag': attrib.TextString, 'Tipo': entity.Name,
-                'Posicao X': attrib.InsertionPoint[0], 'Posicao Y': attrib.InsertionPoint[1],
-                'Posicao Z': attrib.InsertionPoint[2], 'Handle': entity.Handle
-            }
-            for entity in acadModel if entity.EntityName == 'AcDbBlockReference' and entity.HasAttributes
-            for attrib in entity.GetAttributes() if attrib.TagString == 'POSICAO'
-        ]
-        valores_blocos_ordenados = sorted(valores_blocos, key=lambda bloco: bloco['Tag'])
-        for bloco in valores_blocos_ordenados:
-            tag, tipo, pos_x, pos_y, pos_z, handle = bloco.values()
-            row = ft.DataRow(cells=[
-                ft.DataCell(ft.Container(ft.Text(str(tag)), width=140)),
-                ft.DataCell(ft.Container(ft.Text(str(tipo)), width=160)),
-                ft.DataCell(ft.Container(ft.Text(str(pos_x)), width=120)),
-                ft.DataCell(ft.Container(ft.Text(str(pos_y)), width=120)),
-                ft.DataCell(ft.Container(ft.Text(str(pos_z)), width=100)),
-                ft.DataCell(ft.Container(ft.Text(str(handle)), width=80)),
-                ft.DataCell(ft.Row([
-                    ft.IconButton(icon=ft.Icons.ZOOM_IN, icon_color="red",
-                                  data={'Nome': tag, 'Posicao X': pos_x, 'Posicao Y': pos_y, 'Posicao Z': pos_z},
-                                  on_click=zoom_to_block),
-                    ft.IconButton(icon=ft.Icons.INFO_OUTLINE, icon_color="blue",
-                                  data={'Handle': handle}, on_click=listarPropriedades),
-                ])),
-            ])
-            mydt.rows.append(row)
+        encontrados = enumerar_suportes(acadDoc, searchtxt.value, search_option.value) if acadDoc is not None else []
+        # Com o filtro aplicado na passada COM, só o resultado (pequeno) é ordenado
+        novas_linhas = [make_row(*suporte) for suporte in ordenar_suportes(encontrados)]
+        mydt.rows = novas_linhas
         page.update()
 
+    def forcarReleitura(e=None):
+        posicao_attribs.clear()
+        listarSuportes()
+
     mydt = ft.DataTable(
         width=1200, vertical_lines=ft.BorderSide(3, "blue"), horizontal_lines=ft.BorderSide(1, "green"),
         sort_column_index=2, sort_ascending=True, heading_row_color=ft.Colors.BLACK12,
@@ -265,15 +405,16 @@ def main(page: ft.Page):
         page.overlay.append(snack_bar)
         snack_bar.open = True
         page.update()
-        threading.Thread(target=hide_snack_bar_after_delay, args=(snack_bar,)).start()
+        page.run_task(hide_snack_bar_after_delay, snack_bar)
 
-    def hide_snack_bar_after_delay(snack_bar):
-        time.sleep(3)
+    # Tarefas no loop de eventos do Flet: sem criar uma thread por popup
+    async def hide_snack_bar_after_delay(snack_bar):
+        await asyncio.sleep(3)
         snack_bar.open = False
         page.update()
 
-    def hide_container_after_delay():
-        time.sleep(3)
+    async def hide_container_after_delay():
+        await asyncio.sleep(3)
         container_dt_blocos_valores.visible = False
         page.update()
 
@@ -288,6 +429,7 @@ def main(page: ft.Page):
         ft.Column([
             debug_text,
             search_option, searchtxt, ft.Button('Buscar', on_click=listarSuportes),
+            ft.Button('Forçar releitura', on_click=forcarReleitura),
             ft.Container(
                 content=ft.Column([
                     ft.Container(content=mydt, expand=True)
@@ -1,17 +1,22 @@
 import os
+import shutil
 import sys
+import tempfile
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+import numpy as np
 import pandas as pd
 import pythoncom
 import win32com.client
-from PySide6.QtCore import Qt, QThread, Signal
+from PySide6.QtCore import (QMutex, QMutexLocker, QRunnable, Qt, QThread,
+                            QThreadPool, Signal)
 from PySide6.QtGui import QFont
 from PySide6.QtWidgets import (QApplication, QCheckBox, QFileDialog, QHBoxLayout,
                                QLabel, QMainWindow, QMessageBox, QProgressBar,
-                               QPushButton, QSplitter, QTextEdit, QVBoxLayout,
-                               QWidget)
+                               QPushButton, QSpinBox, QSplitter, QTextEdit,
+                               QVBoxLayout, QWidget)
 
 
 class ProcessingConfig:
@@ -19,16 +24,55 @@ class ProcessingConfig:
     # Tentativas de retry
     RETRY_COUNT = 3
 
-    # Tempos de sleep (em segundos) - OTIMIZADOS para performance
-    SLEEP_AFTER_OPEN = 1.0       # Reduzido de 2.0 para 1.0
-    SLEEP_AFTER_SAVE = 0.3       # Reduzido de 0.5 para 0.3
-    SLEEP_BETWEEN_OPS = 0.15     # Reduzido de 0.3 para 0.15
+    # Espera pelo AutoCAD ocioso (em segundos): limite por operação e intervalo de polling
+    QUIESCENT_TIMEOUT = 2.0
+    QUIESCENT_TIMEOUT_FAST = 0.5
+    QUIESCENT_POLL = 0.01
 
     # Colunas obrigatórias do Excel
     REQUIRED_COLUMNS = ['POSICAO', 'TipoSuporte', 'Elevacao', 'MEDIDA_H', 'MEDIDA_L', 'MEDIDA_M', 'MEDIDA_H1', 'MEDIDA_H2', 'MEDIDA_L1', 'MEDIDA_L2', 'MEDIDA_B']
 
+    # Colunas de medida (vazias viram "-")
+    MEDIDA_COLUMNS = ['MEDIDA_H', 'MEDIDA_L', 'MEDIDA_M', 'MEDIDA_H1', 'MEDIDA_H2', 'MEDIDA_L1', 'MEDIDA_L2', 'MEDIDA_B']
+
+    # Nome COM das referências de bloco
+    BLOCK_REFERENCE = "AcDbBlockReference"
+
+    # Instâncias do AutoCAD em paralelo (uma por thread), escolhidas na tela.
+    # Cada instância extra consome uma licença e alguns segundos de inicialização;
+    # 1 (padrão) = sequencial na conexão principal
+    AUTOCAD_INSTANCES = 1
+    MAX_AUTOCAD_INSTANCES = 4
+
+    # Variáveis de sessão desligadas durante o lote (restauradas ao fechar o template).
+    # REGENMODE/REGENAUTO ficam de fora: são salvas no desenho e iriam para as saídas
+    # RASTERPREVIEW=0 evita gerar a miniatura de pré-visualização a cada SaveAs
+    BATCH_SYSVARS = {"FILEDIA": 0, "CMDECHO": 0, "RASTERPREVIEW": 0}
+
+    # AcSaveAsType das saídas: ac2018_dwg (= acNative do AutoCAD 2018 em diante),
+    # explícito para não depender do SAVEFORMAT do usuário
+    SAVE_AS_TYPE = 64
+
+    # Linhas de log acumuladas antes de cada emissão do sinal (por grupo)
+    LOG_BATCH_SIZE = 50
+
+    # Log completo gravado ao lado do Excel; o widget guarda só as últimas linhas
+    LOG_FILENAME = "processamento.log"
+    LOG_MAX_LINES = 2000
+
+    # Threads que movem os .dwg da pasta temporária local para o destino
+    MOVE_WORKERS = 4
+
+    # Ordem das colunas desempacotadas por linha em _process_group
+    ROW_COLUMNS = ['POSICAO', 'Elevacao'] + MEDIDA_COLUMNS
+
+    # Colunas lidas do Excel ('Name' é renomeada para 'TipoSuporte')
+    EXCEL_COLUMNS = frozenset(REQUIRED_COLUMNS) | {'Name'}
+
     # Mapeamento de atributos do AutoCAD
     ATTRIBUTE_TAGS = ["POSICAO", "TIPOSUPORTE", "ELEVACAO", "H", "L", "M", "H1", "H2", "L1", "L2", "B", "DATA_ATUAL"]
+    # Tag -> posição do valor na tupla da linha
+    ATTRIBUTE_INDEX = {tag: i for i, tag in enumerate(ATTRIBUTE_TAGS)}
 
 
 class ProcessingStats:
@@ -45,6 +89,18 @@ class ProcessingStats:
         self.no_attributes_details = []
         self.duplicate_details = []
 
+    def merge(self, other):
+        """Acumula as contagens e detalhes de outro ProcessingStats (exceto total)."""
+        self.success += other.success
+        self.template_not_found += other.template_not_found
+        self.errors += other.errors
+        self.no_attributes += other.no_attributes
+        self.duplicates += other.duplicates
+        self.error_details.extend(other.error_details)
+        self.not_found_details.extend(other.not_found_details)
+        self.no_attributes_details.extend(other.no_attributes_details)
+        self.duplicate_details.extend(other.duplicate_details)
+
     def to_dict(self):
         """Converte para dicionário para sinal."""
         return {
@@ -68,12 +124,13 @@ class COMErrorHandler:
     RPC_E_CALL_REJECTED = -2147418111
 
     @staticmethod
-    def execute_with_retry(func, operation_name="Operation", max_retries=3):
+    def execute_with_retry(func, *args, operation_name="Operation", max_retries=3):
         """
         Executa uma função com retry para erros RPC_E_CALL_REJECTED.
 
         Args:
             func: Função a executar
+            *args: Argumentos repassados a func (dispensa lambdas por chamada)
             operation_name: Nome da operação para log
             max_retries: Número máximo de tentativas
 
@@ -87,7 +144,7 @@ class COMErrorHandler:
 
         for attempt in range(max_retries):
             try:
-                return func()
+                return func(*args)
             except pythoncom.com_error as e:
                 if e.hresult == COMErrorHandler.RPC_E_CALL_REJECTED:
                     if attempt < max_retries - 1:
@@ -100,6 +157,81 @@ class COMErrorHandler:
                 raise
         raise Exception(f"{operation_name} falhou após {max_retries} tentativas")
 
+    @staticmethod
+    def wait_quiescent(acad, timeout=ProcessingConfig.QUIESCENT_TIMEOUT):
+        """
+        Aguarda o AutoCAD ficar ocioso, em vez de um sleep fixo.
+
+        Retorna assim que GetAcadState().IsQuiescent for verdadeiro ou o limite
+        expirar; chamadas rejeitadas (AutoCAD ocupado) contam como não ocioso.
+
+        Args:
+            acad: Aplicação AutoCAD (COM)
+            timeout: Tempo máximo de espera em segundos
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                if acad.GetAcadState().IsQuiescent:
+                    return
+            except pythoncom.com_error:
+                pass
+            if time.monotonic() > deadline:
+                return
+            time.sleep(ProcessingConfig.QUIESCENT_POLL)
+
+
+class GroupBatchRunnable(QRunnable):
+    """Processa um lote de grupos numa instância própria do AutoCAD."""
+
+    def __init__(self, worker, groups, instance_number):
+        super().__init__()
+        self.worker = worker
+        self.groups = groups
+        self.instance_number = instance_number
+
+    def _record_batch_error(self, groups, error):
+        """Registra como erro todos os grupos informados (não processados)."""
+        stats = ProcessingStats()
+        for tipo_suporte, group_df, _, _ in groups:
+            self.worker._record_group_error(stats, tipo_suporte, group_df, error)
+        self.worker._merge_stats(stats)
+
+    def run(self):
+        pythoncom.CoInitialize()
+        acad = None
+        done = 0
+        try:
+            try:
+                # DispatchEx cria um processo novo em vez de reaproveitar o ativo
+                acad = win32com.client.DispatchEx("AutoCAD.Application")
+                acad.Visible = False
+            except Exception as e:
+                self.worker.log.emit(
+                    f"❌ Instância {self.instance_number} do AutoCAD não iniciou: {str(e)}"
+                )
+                self._record_batch_error(self.groups, e)
+                return
+
+            # _process_group trata os próprios erros; exceções fora dele
+            # marcam os grupos restantes do lote como erro
+            for tipo_suporte, group_df, template_path, suffixes in self.groups:
+                if not self.worker._process_group(acad, tipo_suporte, group_df, template_path, suffixes):
+                    break
+                done += 1
+        except Exception as e:
+            self.worker.log.emit(f"❌ Erro na instância {self.instance_number} do AutoCAD: {str(e)}")
+            self._record_batch_error(self.groups[done:], e)
+        finally:
+            if acad is not None:
+                try:
+                    acad.Quit()
+                except Exception as e:
+                    self.worker.log.emit(
+                        f"⚠️ Instância {self.instance_number} do AutoCAD não fechou: {str(e)}"
+                    )
+            pythoncom.CoUninitialize()
+
 
 class AutocadWorker(QThread):
     progress = Signal(int)
@@ -108,18 +240,352 @@ class AutocadWorker(QThread):
     log = Signal(str)
     current_file = Signal(str)
     cancelled = Signal()
+    acad_ready = Signal(object)
 
-    def __init__(self, excel_path, template_folder, fast_mode=False):
+    def __init__(self, excel_path, template_folder, fast_mode=False, acad_stream=None,
+                 instances=ProcessingConfig.AUTOCAD_INSTANCES):
         super().__init__()
         self.excel_path = excel_path
         self.template_folder = template_folder
         self.fast_mode = fast_mode
+        self.instances = instances
+        # Conexão de uma execução anterior, empacotada para esta thread
+        self.acad_stream = acad_stream
         self._is_cancelled = False
+        self._move_executor = None
 
     def cancel_processing(self):
         """Cancela o processamento atual."""
         self._is_cancelled = True
 
+    def _connect_autocad(self):
+        """
+        Reaproveita a conexão da execução anterior ou cria uma nova.
+
+        Uma conexão nova é devolvida à MainWindow via acad_ready (stream COM
+        empacotado) para ser repassada às próximas execuções.
+
+        Returns:
+            Aplicação AutoCAD (COM) utilizável nesta thread
+        """
+        if self.acad_stream is not None:
+            stream, self.acad_stream = self.acad_stream, None
+            try:
+                acad = win32com.client.Dispatch(
+                    pythoncom.CoGetInterfaceAndReleaseStream(stream, pythoncom.IID_IDispatch)
+                )
+                acad.Visible = False
+                return acad
+            except pythoncom.com_error:
+                # AutoCAD foi fechado desde a última execução
+                pass
+
+        acad = win32com.client.Dispatch("AutoCAD.Application")
+        acad.Visible = False
+        self.acad_ready.emit(
+            pythoncom.CoMarshalInterThreadInterfaceInStream(pythoncom.IID_IDispatch, acad._oleobj_)
+        )
+        return acad
+
+    def _read_excel(self):
+        """
+        Lê apenas as colunas usadas, com o leitor calamine (Rust) quando disponível.
+
+        Returns:
+            DataFrame com as colunas do processamento
+        """
+        usecols = lambda col: col in ProcessingConfig.EXCEL_COLUMNS
+        try:
+            return pd.read_excel(self.excel_path, engine="calamine", usecols=usecols)
+        except (ImportError, ValueError):
+            # python-calamine ausente ou pandas < 2.2: mantém o openpyxl
+            return pd.read_excel(self.excel_path, usecols=usecols)
+
+    def _list_templates(self):
+        """
+        Lista a pasta de templates uma única vez (uma varredura em vez de um stat por grupo).
+
+        Returns:
+            Conjunto com os nomes dos .dwg, normalizados por os.path.normcase
+        """
+        try:
+            with os.scandir(self.template_folder) as entries:
+                return {
+                    os.path.normcase(entry.name) for entry in entries
+                    if entry.is_file() and entry.name.lower().endswith('.dwg')
+                }
+        except OSError:
+            return set()
+
+    @staticmethod
+    def _column_as_str(series):
+        """Converte uma coluna inteira para lista de str (mesmo resultado de str() por célula)."""
+        return series.to_numpy(dtype=object).astype(str).tolist()
+
+    def _advance_progress(self):
+        """
+        Conta uma linha processada (thread-safe).
+
+        Returns:
+            Tupla (total acumulado, percentual) - percentual é None quando não
+            mudou desde a última emissão, para não repetir sinais iguais
+        """
+        with QMutexLocker(self._stats_mutex):
+            self._processed += 1
+            percent = int(self._processed / self._total_rows * 100)
+            if percent == self._last_progress:
+                return self._processed, None
+            self._last_progress = percent
+            return self._processed, percent
+
+    def _merge_stats(self, stats):
+        """Soma as estatísticas de um grupo às da execução (thread-safe)."""
+        with QMutexLocker(self._stats_mutex):
+            self._stats.merge(stats)
+
+    @staticmethod
+    def _set_sysvars(doc, values):
+        """
+        Aplica variáveis de sistema via documento aberto.
+
+        Args:
+            doc: Documento AutoCAD (COM)
+            values: Dicionário {variável: valor}
+
+        Returns:
+            Valores anteriores das variáveis alteradas (para restaurar)
+        """
+        previous = {}
+        for name, value in values.items():
+            try:
+                previous[name] = doc.GetVariable(name)
+                doc.SetVariable(name, value)
+            except Exception:
+                pass
+        return previous
+
+    def _queue_move(self, temp_path, output_path, posicao):
+        """Agenda a cópia de um desenho salvo localmente para o destino final."""
+        future = self._move_executor.submit(shutil.move, temp_path, output_path)
+        with QMutexLocker(self._stats_mutex):
+            self._moves.append((future, posicao, output_path))
+
+    def _finish_moves(self, stats):
+        """
+        Aguarda as movimentações pendentes e remove a pasta temporária.
+
+        Arquivos que não puderam ser movidos deixam de contar como sucesso.
+
+        Args:
+            stats: Estatísticas da execução
+        """
+        if self._move_executor is None:
+            return
+        self._move_executor.shutdown(wait=True)
+        self._move_executor = None
+        for future, posicao, output_path in self._moves:
+            error = future.exception()
+            if error is not None:
+                self.log.emit(f"❌ Falha ao gravar {output_path}: {str(error)}")
+                stats.success -= 1
+                stats.errors += 1
+                stats.error_details.append(f"{posicao}: {str(error)}")
+        self._moves = []
+        shutil.rmtree(self._scratch_dir, ignore_errors=True)
+
+    def _flush_log(self, lines):
+        """Envia as linhas acumuladas num único sinal de log e esvazia a lista."""
+        if lines:
+            self.log.emit("\n".join(lines))
+            lines.clear()
+
+    def _record_group_error(self, stats, tipo_suporte, group_df, error):
+        """Registra a falha de um grupo inteiro nas estatísticas informadas."""
+        self.log.emit(f"❌ Erro no grupo {tipo_suporte}: {str(error)}")
+        stats.errors += len(group_df)
+        stats.error_details.extend(
+            f"{posicao}: {str(error)}" for posicao in group_df['POSICAO'].tolist()
+        )
+
+    def _process_group(self, acad, tipo_suporte, group_df, template_path, suffixes):
+        """
+        Gera os desenhos de um grupo (mesmo template) numa instância do AutoCAD.
+
+        Args:
+            acad: Aplicação AutoCAD (COM) da thread atual
+            tipo_suporte: Nome do template
+            group_df: Linhas do grupo
+            template_path: Caminho do .dwg do template
+            suffixes: Sufixos de duplicata, na ordem das linhas do grupo
+
+        Returns:
+            False se o processamento foi cancelado, True caso contrário
+        """
+        if self._is_cancelled:
+            return False
+
+        stats = ProcessingStats()
+        total_rows = self._total_rows
+        data_atual = self._data_atual
+        wait_timeout = self._wait_timeout
+        output_dir = os.path.dirname(self.excel_path)
+        scratch_dir = self._scratch_dir
+
+        # Log do grupo acumulado e enviado em blocos (menos sinais entre threads)
+        log_lines = [
+            f"\n{'='*50}",
+            f"TEMPLATE: {tipo_suporte}.dwg ({len(group_df)} documentos)",
+            f"{'='*50}",
+        ]
+
+        # Abre o template uma vez; cada linha preenche os atributos e faz SaveAs
+        # para o arquivo de saída (o .dwg do template nunca é sobrescrito)
+        template_doc = None
+        previous_sysvars = {}
+        # Último arquivo salvo: fica travado pelo AutoCAD até o próximo SaveAs
+        # (ou o Close), só então pode ser movido para o destino
+        pending_move = None
+
+        def release_output():
+            nonlocal pending_move
+            if pending_move is not None:
+                self._queue_move(*pending_move)
+                pending_move = None
+
+        def close_template():
+            try:
+                self._set_sysvars(template_doc, previous_sysvars)
+                template_doc.Close(False)
+            except:
+                pass
+            release_output()
+
+        try:
+            template_doc = COMErrorHandler.execute_with_retry(
+                acad.Documents.Open, template_path,
+                operation_name=f"Open {template_path}",
+                max_retries=2
+            )
+            if template_doc is None:
+                raise Exception("Falha ao abrir template")
+            COMErrorHandler.wait_quiescent(acad, wait_timeout)
+            previous_sysvars = self._set_sysvars(template_doc, ProcessingConfig.BATCH_SYSVARS)
+
+            # Localiza os atributos do template uma única vez por grupo: as linhas
+            # só reatribuem TextString nos objetos já encontrados
+            found_attributes = False
+            # (posição do valor na tupla da linha, atributo COM), na ordem do template
+            attrib_slots = []
+
+            def scan_attributes():
+                nonlocal found_attributes
+                found_attributes = False
+                attrib_slots.clear()
+                for entity in template_doc.PaperSpace:
+                    if entity.ObjectName == ProcessingConfig.BLOCK_REFERENCE and entity.HasAttributes:
+                        found_attributes = True
+                        for attrib in entity.GetAttributes():
+                            tag = attrib.TagString.upper()
+                            slot = ProcessingConfig.ATTRIBUTE_INDEX.get(tag)
+                            if slot is not None:
+                                attrib_slots.append((slot, attrib))
+
+            try:
+                COMErrorHandler.execute_with_retry(
+                    scan_attributes,
+                    operation_name="Scan attributes",
+                    max_retries=2
+                )
+            except:
+                pass
+
+            # Funções criadas uma vez por grupo: fill_attributes lê row_values
+            # e attr_count do escopo do grupo, reatribuídos a cada linha
+            row_values = ()
+            attr_count = 0
+            save_as = template_doc.SaveAs
+
+            def fill_attributes():
+                nonlocal attr_count
+                # Só as atribuições COM: sem dicionário nem comparação de tags por linha
+                for slot, attrib in attrib_slots:
+                    attrib.TextString = row_values[slot]
+                    attr_count += 1
+
+            # Processa cada documento deste tipo
+            # Colunas já normalizadas em run(); tuplas simples, na ordem de ROW_COLUMNS
+            rows = group_df[ProcessingConfig.ROW_COLUMNS].itertuples(index=False, name=None)
+            for idx, (posicao, elevacao, h, l, m, h1, h2, l1, l2, b) in enumerate(rows):
+                if self._is_cancelled:
+                    close_template()
+                    return False
+
+                output_filename = f"{posicao}{suffixes[idx]}.dwg"
+                output_path = os.path.join(output_dir, output_filename)
+                temp_path = os.path.join(scratch_dir, output_filename)
+
+                # Barra e label só mudam quando o percentual avança (ou no início do grupo)
+                done, percent = self._advance_progress()
+                if percent is not None:
+                    self.progress.emit(percent)
+                if percent is not None or idx == 0:
+                    self.current_file.emit(f"[{idx+1}/{len(group_df)}] {posicao} ({tipo_suporte})")
+                if len(log_lines) >= ProcessingConfig.LOG_BATCH_SIZE:
+                    self._flush_log(log_lines)
+                log_lines.append(f"[{done}/{total_rows}] {posicao} -> {output_filename}")
+
+                # Valores da linha na ordem de ATTRIBUTE_TAGS
+                row_values = (posicao, tipo_suporte, elevacao, h, l, m, h1, h2, l1, l2, b, data_atual)
+
+                # Preenche atributos. Uma falha no meio deixaria o template com valores
+                # da linha anterior: a linha vira erro e não é salva
+                attr_count = 0
+                try:
+                    COMErrorHandler.execute_with_retry(
+                        fill_attributes,
+                        operation_name="Fill attributes",
+                        max_retries=2
+                    )
+                except Exception as e:
+                    log_lines.append(f"  ❌ Falha ao preencher atributos: {str(e)}")
+                    stats.errors += 1
+                    stats.error_details.append(f"{posicao}: {str(e)}")
+                    continue
+
+                if not found_attributes or attr_count == 0:
+                    log_lines.append("  ⚠️ Sem atributos -> pulado")
+                    stats.no_attributes += 1
+                    stats.no_attributes_details.append(f"{posicao} (Tipo: {tipo_suporte})")
+                    continue
+
+                # Salva no disco local (o documento aberto passa a ser esse arquivo);
+                # a cópia para a pasta de saída, possivelmente de rede, roda em segundo plano
+                COMErrorHandler.execute_with_retry(
+                    save_as, temp_path, ProcessingConfig.SAVE_AS_TYPE,
+                    operation_name=f"SaveAs {temp_path}",
+                    max_retries=2
+                )
+                COMErrorHandler.wait_quiescent(acad, wait_timeout)
+                release_output()
+                pending_move = (temp_path, output_path, posicao)
+
+                log_lines.append(f"  ✅ {output_filename} criado!")
+                stats.success += 1
+
+            # Fecha o template do lote
+            close_template()
+
+        except Exception as e:
+            self._flush_log(log_lines)
+            self._record_group_error(stats, tipo_suporte, group_df, e)
+            if template_doc:
+                close_template()
+        finally:
+            self._flush_log(log_lines)
+            self._merge_stats(stats)
+
+        return True
+
     def run(self):
         try:
             # Estatísticas para o relatório final
@@ -130,7 +596,7 @@ class AutocadWorker(QThread):
 
             # Lê o arquivo Excel
             self.log.emit("Lendo arquivo Excel...")
-            df = pd.read_excel(self.excel_path)
+            df = self._read_excel()
 
             # Renomeia coluna 'Name' para 'TipoSuporte' se existir
             if 'Name' in df.columns:
@@ -147,11 +613,17 @@ class AutocadWorker(QThread):
                 self.finished.emit(stats.to_dict())
                 return
 
+            # Normaliza as colunas de texto uma única vez para a planilha inteira
+            # (medidas vazias viram "-"); os grupos só leem as listas prontas
+            df['POSICAO'] = self._column_as_str(df['POSICAO'])
+            df['Elevacao'] = [valor.replace(',', '.') for valor in self._column_as_str(df['Elevacao'])]
+            for col in ProcessingConfig.MEDIDA_COLUMNS:
+                df[col] = self._column_as_str(df[col].where(df[col].notna(), "-"))
+
             # Inicializa o AutoCAD
             self.log.emit("Conectando ao AutoCAD...")
             try:
-                acad = win32com.client.Dispatch("AutoCAD.Application")
-                acad.Visible = False
+                acad = self._connect_autocad()
                 self.log.emit("Conexão com AutoCAD estabelecida com sucesso.")
             except Exception as e:
                 self.error.emit(f"Erro ao conectar com AutoCAD: {str(e)}")
@@ -164,194 +636,101 @@ class AutocadWorker(QThread):
             total_rows = len(df)
             stats.total = total_rows
 
-            # Rastreia posições já processadas para detectar duplicatas
-            position_counter = {}
+            # Data do carimbo: igual para todos os documentos da execução
+            data_atual = datetime.now().strftime('%d/%m/%Y')
+
+            # Estado compartilhado pelos grupos (possivelmente em threads paralelas)
+            self._stats = stats
+            self._stats_mutex = QMutex()
+            self._processed = 0
+            self._last_progress = -1
+            self._total_rows = total_rows
+            self._data_atual = data_atual
 
             # AGRUPA POR TIPO DE SUPORTE para processamento em lote
             grouped = df.groupby('TipoSuporte')
             total_groups = len(grouped)
-            processed_count = 0
 
             self.log.emit(f"Iniciando processamento de {total_rows} registros em {total_groups} grupo(s) de templates.")
 
-            # Define sleep times baseado no modo
+            # Limite da espera pelo AutoCAD ocioso baseado no modo
             if self.fast_mode:
-                base_sleep_open, base_sleep_save, base_sleep_between = 0.3, 0.05, 0.02
+                self._wait_timeout = ProcessingConfig.QUIESCENT_TIMEOUT_FAST
             else:
-                base_sleep_open, base_sleep_save, base_sleep_between = 1.0, 0.3, 0.15
+                self._wait_timeout = ProcessingConfig.QUIESCENT_TIMEOUT
 
+            # Separa os grupos sem template e atribui os sufixos de duplicata antes
+            # de processar: a numeração fica igual mesmo com grupos em paralelo
+            groups_ok = []
+            existing_templates = self._list_templates()
             for tipo_suporte, group_df in grouped:
-                if self._is_cancelled:
-                    self.log.emit("\n⚠️ Processamento cancelado pelo usuário.")
-                    self.cancelled.emit()
-                    return
-
                 template_path = os.path.join(self.template_folder, f"{tipo_suporte}.dwg")
 
                 # Verifica se o template existe
-                if not os.path.exists(template_path):
+                if os.path.normcase(f"{tipo_suporte}.dwg") not in existing_templates:
                     self.log.emit(f"⚠️ Template {tipo_suporte} não encontrado. Pulando {len(group_df)} registros.")
                     stats.template_not_found += len(group_df)
-                    for _, row in group_df.iterrows():
-                        posicao = str(row['POSICAO'])
-                        stats.not_found_details.append(f"{posicao} (Tipo: {tipo_suporte})")
-                    processed_count += len(group_df)
-                    continue
-
-                self.log.emit(f"\n{'='*50}")
-                self.log.emit(f"TEMPLATE: {tipo_suporte}.dwg ({len(group_df)} documentos)")
-                self.log.emit(f"{'='*50}")
-
-                # Abre o template para processar este lote
-                doc = None
-                template_doc = None
-                try:
-                    template_doc = COMErrorHandler.execute_with_retry(
-                        lambda: acad.Documents.Open(template_path),
-                        operation_name=f"Open {template_path}",
-                        max_retries=2
+                    stats.not_found_details.extend(
+                        f"{posicao} (Tipo: {tipo_suporte})" for posicao in group_df['POSICAO'].tolist()
                     )
-                    if template_doc is None:
-                        raise Exception("Falha ao abrir template")
-                    time.sleep(base_sleep_open)
-
-                    # Processa cada documento deste tipo
-                    for idx, (_, row) in enumerate(group_df.iterrows()):
-                        i = processed_count + idx
-                        if self._is_cancelled:
-                            try:
-                                template_doc.Close(False)
-                            except:
-                                pass
-                            self.cancelled.emit()
-                            return
-
-                        posicao = str(row['POSICAO'])
-                        elevacao = str(row['Elevacao']).replace(',', '.')
-                        h = str(row['MEDIDA_H']) if pd.notna(row['MEDIDA_H']) else "-"
-                        l = str(row['MEDIDA_L']) if pd.notna(row['MEDIDA_L']) else "-"
-                        m = str(row['MEDIDA_M']) if pd.notna(row['MEDIDA_M']) else "-"
-                        h1 = str(row['MEDIDA_H1']) if pd.notna(row['MEDIDA_H1']) else "-"
-                        h2 = str(row['MEDIDA_H2']) if pd.notna(row['MEDIDA_H2']) else "-"
-                        l1 = str(row['MEDIDA_L1']) if pd.notna(row['MEDIDA_L1']) else "-"
-                        l2 = str(row['MEDIDA_L2']) if pd.notna(row['MEDIDA_L2']) else "-"
-                        b = str(row['MEDIDA_B']) if pd.notna(row['MEDIDA_B']) else "-"
-
-                        # Tratamento de duplicatas
-                        if posicao not in position_counter:
-                            position_counter[posicao] = 1
-                            filename_suffix = ""
-                        else:
-                            position_counter[posicao] += 1
-                            filename_suffix = f"_{position_counter[posicao]}"
-                            stats.duplicates += 1
-                            stats.duplicate_details.append(f"{posicao} -> {posicao}{filename_suffix}")
-
-                        output_filename = f"{posicao}{filename_suffix}.dwg"
-                        output_path = os.path.join(os.path.dirname(self.excel_path), output_filename)
-
-                        progress_percent = int((processed_count + idx + 1) / total_rows * 100)
-                        self.progress.emit(progress_percent)
-                        self.current_file.emit(f"[{idx+1}/{len(group_df)}] {posicao} ({tipo_suporte})")
-                        self.log.emit(f"[{i+1}/{total_rows}] {posicao} -> {output_filename}")
-
-                        # Mapeamento de atributos
-                        attribute_mapping = {
-                            "POSICAO": posicao,
-                            "TIPOSUPORTE": tipo_suporte,
-                            "ELEVACAO": elevacao,
-                            "H": h, "L": l, "M": m,
-                            "H1": h1, "H2": h2,
-                            "L1": l1, "L2": l2,
-                            "B": b,
-                            "DATA_ATUAL": datetime.now().strftime('%d/%m/%Y')
-                        }
-
-                        # Para documentos após o primeiro, reabre o template
-                        if idx > 0:
-                            time.sleep(base_sleep_between)
-                            doc = COMErrorHandler.execute_with_retry(
-                                lambda: acad.Documents.Open(template_path),
-                                operation_name=f"Reopen {template_path}",
-                                max_retries=2
-                            )
-                            time.sleep(base_sleep_open * 0.5)
-                        else:
-                            doc = template_doc
-                            time.sleep(base_sleep_between)
-
-                        # Preenche atributos
-                        attr_count = 0
-                        found_attributes = False
-
-                        def fill_attributes():
-                            nonlocal attr_count, found_attributes
-                            for entity in doc.PaperSpace:
-                                if entity.ObjectName == "AcDbBlockReference" and entity.HasAttributes:
-                                    found_attributes = True
-                                    for attrib in entity.GetAttributes():
-                                        tag = attrib.TagString.upper()
-                                        if tag in attribute_mapping:
-                                            attrib.TextString = attribute_mapping[tag]
-                                            attr_count += 1
-
-                        try:
-                            COMErrorHandler.execute_with_retry(
-                                fill_attributes,
-                                operation_name="Fill attributes",
-                                max_retries=2
-                            )
-                        except:
-                            pass
-
-                        if not found_attributes or attr_count == 0:
-                            self.log.emit(f"  ⚠️ Sem atributos -> pulado")
-                            stats.no_attributes += 1
-                            stats.no_attributes_details.append(f"{posicao} (Tipo: {tipo_suporte})")
-                            if idx > 0:
-                                try:
-                                    doc.Close(False)
-                                except:
-                                    pass
-                            doc = None
-                            continue
-
-                        # Salva
-                        time.sleep(base_sleep_between)
-                        COMErrorHandler.execute_with_retry(
-                            lambda: doc.SaveAs(output_path),
-                            operation_name=f"SaveAs {output_path}",
-                            max_retries=2
-                        )
-                        time.sleep(base_sleep_save)
-                        doc.Close()
-                        doc = None
-
-                        self.log.emit(f"  ✅ {output_filename} criado!")
-                        stats.success += 1
-
-                    # Fecha o template do lote
-                    try:
-                        template_doc.Close(False)
-                    except:
-                        pass
-
-                    processed_count += len(group_df)
+                    self._processed += len(group_df)
+                    continue
 
-                except Exception as e:
-                    self.log.emit(f"❌ Erro no grupo {tipo_suporte}: {str(e)}")
-                    stats.errors += len(group_df)
-                    for _, row in group_df.iterrows():
-                        stats.error_details.append(f"{str(row['POSICAO'])}: {str(e)}")
-                    try:
-                        if doc:
-                            doc.Close(False)
-                        try:
-                            template_doc.Close(False)
-                        except:
-                            pass
-                    except:
-                        pass
+                groups_ok.append((tipo_suporte, group_df, template_path))
+
+            pending = []
+            if groups_ok:
+                # Tratamento de duplicatas (vetorizado): n-ésima ocorrência da posição,
+                # na ordem de processamento, recebe o sufixo _n
+                posicoes = pd.concat(
+                    [group_df['POSICAO'] for _, group_df, _ in groups_ok], ignore_index=True
+                )
+                dup_idx = posicoes.groupby(posicoes).cumcount()
+                is_dup = (dup_idx > 0).to_numpy()
+                suffixes_all = np.where(is_dup, "_" + (dup_idx + 1).to_numpy().astype(str), "").tolist()
+
+                stats.duplicates += int(is_dup.sum())
+                stats.duplicate_details.extend(
+                    f"{posicao} -> {posicao}{suffix}"
+                    for posicao, suffix in zip(posicoes.tolist(), suffixes_all) if suffix
+                )
+                if stats.duplicates:
+                    self.log.emit(f"{stats.duplicates} posição(ões) duplicada(s) receberão sufixo no nome do arquivo.")
+
+                start = 0
+                for tipo_suporte, group_df, template_path in groups_ok:
+                    end = start + len(group_df)
+                    pending.append((tipo_suporte, group_df, template_path, suffixes_all[start:end]))
+                    start = end
+
+            # SaveAs em pasta temporária local; movimentação para o destino em threads
+            self._scratch_dir = tempfile.mkdtemp(prefix="suportes_")
+            self._move_executor = ThreadPoolExecutor(max_workers=ProcessingConfig.MOVE_WORKERS)
+            self._moves = []
+
+            instances = min(self.instances, len(pending))
+            if instances <= 1:
+                for tipo_suporte, group_df, template_path, suffixes in pending:
+                    if not self._process_group(acad, tipo_suporte, group_df, template_path, suffixes):
+                        break
+            else:
+                # Uma instância do AutoCAD por thread; grupos maiores distribuídos primeiro
+                self.log.emit(f"Processando em paralelo com {instances} instâncias do AutoCAD.")
+                batches = [[] for _ in range(instances)]
+                for n, group in enumerate(sorted(pending, key=lambda g: len(g[1]), reverse=True)):
+                    batches[n % instances].append(group)
+                pool = QThreadPool()
+                pool.setMaxThreadCount(instances)
+                for n, batch in enumerate(batches, 1):
+                    pool.start(GroupBatchRunnable(self, batch, n))
+                pool.waitForDone()
+
+            self._finish_moves(stats)
+
+            if self._is_cancelled:
+                self.log.emit("\n⚠️ Processamento cancelado pelo usuário.")
+                self.cancelled.emit()
+                return
 
             self.log.emit("\n===== PROCESSAMENTO CONCLUÍDO =====")
             self.finished.emit(stats.to_dict())
@@ -363,6 +742,8 @@ class AutocadWorker(QThread):
             stats.error_details.append(f"Erro geral: {str(e)}")
             self.finished.emit(stats.to_dict())
         finally:
+            # Garante a pasta temporária limpa mesmo após erro geral
+            self._finish_moves(ProcessingStats())
             # Limpa COM
             pythoncom.CoUninitialize()
 
@@ -412,6 +793,18 @@ class MainWindow(QMainWindow):
         self.fast_mode_checkbox.setToolTip("Reduz tempo de processamento (use apenas se estável)")
         self.fast_mode_checkbox.setChecked(False)
 
+        # Instâncias do AutoCAD em paralelo (1 = sequencial)
+        instances_layout = QHBoxLayout()
+        self.instances_spinbox = QSpinBox()
+        self.instances_spinbox.setRange(1, ProcessingConfig.MAX_AUTOCAD_INSTANCES)
+        self.instances_spinbox.setValue(ProcessingConfig.AUTOCAD_INSTANCES)
+        self.instances_spinbox.setToolTip(
+            "Cada instância extra abre um AutoCAD próprio (consome licença e memória)"
+        )
+        instances_layout.addWidget(QLabel("Instâncias do AutoCAD:"))
+        instances_layout.addWidget(self.instances_spinbox)
+        instances_layout.addStretch(1)
+
         # Área de progresso com detalhes
         progress_layout = QHBoxLayout()
         self.progress_bar = QProgressBar()
@@ -429,6 +822,7 @@ class MainWindow(QMainWindow):
         controls_layout.addWidget(self.process_button)
         controls_layout.addWidget(self.cancel_button)
         controls_layout.addWidget(self.fast_mode_checkbox)
+        controls_layout.addLayout(instances_layout)
         controls_layout.addLayout(progress_layout)
 
         controls_widget = QWidget()
@@ -439,6 +833,8 @@ class MainWindow(QMainWindow):
         log_label = QLabel("Log de Processamento:")
         self.log_text = QTextEdit()
         self.log_text.setReadOnly(True)
+        # Limita o documento: memória e relayout não crescem com o número de linhas
+        self.log_text.document().setMaximumBlockCount(ProcessingConfig.LOG_MAX_LINES)
         # Usar fonte monoespaçada para melhor legibilidade do log
         font = QFont("Consolas" if sys.platform == "win32" else "Monospace")
         font.setPointSize(10)
@@ -467,6 +863,9 @@ class MainWindow(QMainWindow):
         # Variáveis de instância
         self.excel_path = None
         self.template_folder = None
+        # Conexão com o AutoCAD mantida entre execuções (thread principal)
+        self._acad = None
+        self._log_file = None
         self.worker = None
 
     def select_excel_file(self):
@@ -496,8 +895,9 @@ class MainWindow(QMainWindow):
             self.process_button.setEnabled(False)
 
     def process_data(self):
-        # Limpa o log
+        # Limpa o log e abre o arquivo com o log completo da execução
         self.log_text.clear()
+        self._open_log_file()
 
         # Desativa os botões durante o processamento
         self.excel_button.setEnabled(False)
@@ -511,12 +911,23 @@ class MainWindow(QMainWindow):
         self.add_to_log(f"Pasta de Templates: {self.template_folder}")
         self.add_to_log("-" * 50)
 
-        # Cria e inicia o worker thread
+        # Cria e inicia o worker thread (reaproveitando a conexão anterior, se houver)
+        acad_stream = None
+        if self._acad is not None:
+            try:
+                acad_stream = pythoncom.CoMarshalInterThreadInterfaceInStream(
+                    pythoncom.IID_IDispatch, self._acad._oleobj_
+                )
+            except pythoncom.com_error:
+                self._acad = None
         self.worker = AutocadWorker(
             self.excel_path,
             self.template_folder,
-            fast_mode=self.fast_mode_checkbox.isChecked()
+            fast_mode=self.fast_mode_checkbox.isChecked(),
+            acad_stream=acad_stream,
+            instances=self.instances_spinbox.value()
         )
+        self.worker.acad_ready.connect(self.store_acad)
         self.worker.progress.connect(self.update_progress)
         self.worker.log.connect(self.add_to_log)
         self.worker.error.connect(self.show_error)
@@ -528,6 +939,15 @@ class MainWindow(QMainWindow):
         # Mostrar botão de cancelar
         self.cancel_button.setEnabled(True)
 
+    def store_acad(self, stream):
+        """Guarda a conexão criada pelo worker para as próximas execuções."""
+        try:
+            self._acad = win32com.client.Dispatch(
+                pythoncom.CoGetInterfaceAndReleaseStream(stream, pythoncom.IID_IDispatch)
+            )
+        except pythoncom.com_error:
+            self._acad = None
+
     def cancel_processing(self):
         """Solicita o cancelamento do processamento."""
         reply = QMessageBox.question(
@@ -546,6 +966,7 @@ class MainWindow(QMainWindow):
         self.add_to_log("\n" + "=" * 50)
         self.add_to_log("PROCESSAMENTO CANCELADO PELO USUÁRIO")
         self.add_to_log("=" * 50)
+        self._close_log_file()
         self.cancel_button.setEnabled(False)
         self.excel_button.setEnabled(True)
         self.template_button.setEnabled(True)
@@ -559,7 +980,27 @@ class MainWindow(QMainWindow):
         """Atualiza o label com o arquivo atual."""
         self.progress_label.setText(file_info)
 
+    def _open_log_file(self):
+        """Abre (em modo append, com buffer de 64 KB) o arquivo de log ao lado do Excel."""
+        self._close_log_file()
+        log_path = os.path.join(os.path.dirname(self.excel_path), ProcessingConfig.LOG_FILENAME)
+        try:
+            self._log_file = open(log_path, "a", encoding="utf-8", buffering=1 << 16)
+        except OSError:
+            self._log_file = None
+
+    def _close_log_file(self):
+        """Fecha o arquivo de log (grava o que restar no buffer)."""
+        if self._log_file is not None:
+            try:
+                self._log_file.close()
+            except OSError:
+                pass
+            self._log_file = None
+
     def add_to_log(self, message):
+        if self._log_file is not None:
+            self._log_file.write(message + "\n")
         self.log_text.append(message)
         # Rola para o fim do texto
         scrollbar = self.log_text.verticalScrollBar()
@@ -607,6 +1048,7 @@ class MainWindow(QMainWindow):
 
         self.add_to_log("\n" + "=" * 50)
         self.add_to_log(f"Processamento finalizado em: {time.strftime('%d/%m/%Y %H:%M:%S')}")
+        self._close_log_file()
 
         # Reativa os botões
         self.excel_button.setEnabled(True)
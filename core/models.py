@@ -1,10 +1,15 @@
 """Modelos de dados para suportes AutoCAD."""
 
+import operator
+import sys
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
+# __slots__ nos modelos (menos memória por instância); disponível a partir do Python 3.10
+_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
 
-@dataclass
+
+@dataclass(**_SLOTS)
 class SuporteData:
     """
     Representa um suporte de tubulação no AutoCAD.
@@ -29,12 +34,21 @@ class SuporteData:
     propriedades: Dict[str, Any] = field(default_factory=dict)
     layer: str = ""
     selecionado: bool = False
+    # Nomes de propriedades ordenados (calculado sob demanda)
+    _nomes_cache: Optional[Tuple[str, ...]] = field(default=None, init=False, repr=False, compare=False)
+    # Versões em minúsculas usadas pelos filtros de texto (calculadas uma vez)
+    tag_lower: str = field(default='', init=False, repr=False, compare=False)
+    tipo_lower: str = field(default='', init=False, repr=False, compare=False)
+    layer_lower: str = field(default='', init=False, repr=False, compare=False)
 
     def __post_init__(self):
         """Normaliza dados após inicialização."""
         self.tag = str(self.tag).strip()
         self.tipo = str(self.tipo).strip()
         self.handle = str(self.handle).strip()
+        self.tag_lower = self.tag.lower()
+        self.tipo_lower = self.tipo.lower()
+        self.layer_lower = self.layer.lower()
 
     @property
     def posicao(self) -> str:
@@ -61,8 +75,18 @@ class SuporteData:
             nome: Nome da propriedade
             valor: Valor a ser definido
         """
+        if nome not in self.propriedades:
+            self._nomes_cache = None
         self.propriedades[nome] = valor
 
+    @property
+    def nomes_propriedades(self) -> Tuple[str, ...]:
+        """Nomes de propriedades dinâmicas ordenados (em cache até surgir um nome novo)."""
+        if self._nomes_cache is None:
+            # Excluir 'Origin' que não é uma propriedade editável
+            self._nomes_cache = tuple(sorted(p for p in self.propriedades if p != "Origin"))
+        return self._nomes_cache
+
     def listar_nomes_propriedades(self) -> List[str]:
         """
         Retorna lista de nomes de propriedades dinâmicas.
@@ -70,8 +94,7 @@ class SuporteData:
         Returns:
             Lista ordenada de nomes de propriedades
         """
-        # Excluir 'Origin' que não é uma propriedade editável
-        return sorted([p for p in self.propriedades.keys() if p != "Origin"])
+        return list(self.nomes_propriedades)
 
     def to_dict(self) -> Dict[str, Any]:
         """
@@ -116,7 +139,32 @@ class SuporteData:
         )
 
 
-@dataclass
+def _nunca(alvo: str, valor: str) -> bool:
+    return False
+
+
+# Comparações de texto por operador canônico: (alvo_lower, valor_lower) -> bool
+_OPERACOES_TEXTO: Dict[str, Callable[[str, str], bool]] = {
+    'contem': operator.contains,
+    'nao_contem': lambda alvo, valor: valor not in alvo,
+    'inicia_com': str.startswith,
+    'termina_com': str.endswith,
+    'igual': operator.eq,
+    'diferente': operator.ne,
+}
+
+
+# Comparações numéricas por operador canônico ('entre' é tratado à parte)
+_OPERACOES_NUM: Dict[str, Callable[[float, float], bool]] = {
+    'igual': operator.eq,
+    'maior': operator.gt,
+    'menor': operator.lt,
+    'maior_igual': operator.ge,
+    'menor_igual': operator.le,
+}
+
+
+@dataclass(**_SLOTS)
 class FiltroBusca:
     """
     Representa um filtro de busca.
@@ -131,6 +179,23 @@ class FiltroBusca:
     operador: str
     valor: Any
     valor_secundario: Optional[Any] = None
+    # Chave canônica do operador (resolvida uma vez em __post_init__)
+    _op: str = field(default='', init=False, repr=False, compare=False)
+    # Valor em minúsculas e comparação de texto, especializados na criação
+    _valor_lower: str = field(default='', init=False, repr=False, compare=False)
+    _comparar_texto: Callable[[str, str], bool] = field(
+        default=_nunca, init=False, repr=False, compare=False
+    )
+    # Valor numérico do filtro e limites ordenados de 'entre' (None se inválidos)
+    _num: Optional[float] = field(default=None, init=False, repr=False, compare=False)
+    _limites: Optional[Tuple[float, float]] = field(default=None, init=False, repr=False, compare=False)
+    # Resultado já calculado por valor alvo (muitos suportes repetem tipo/layer)
+    _resultados: Dict[Tuple[type, Any], bool] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+
+    # Limite de entradas do cache de resultados
+    MAX_RESULTADOS = 4096
 
     OPERADORES_TEXT = {
         'contem': 'Contém',
@@ -150,6 +215,64 @@ class FiltroBusca:
         'entre': 'Entre',
     }
 
+    def __post_init__(self):
+        """Resolve o operador e pré-calcula a comparação de texto."""
+        self._preparar()
+
+    def __setattr__(self, nome: str, valor: Any) -> None:
+        """Refaz a preparação quando um parâmetro do filtro muda."""
+        object.__setattr__(self, nome, valor)
+        if nome in ('campo', 'operador', 'valor', 'valor_secundario') and hasattr(self, '_resultados'):
+            self._preparar()
+
+    def _preparar(self) -> None:
+        """Especializa o filtro para os parâmetros atuais e limpa o cache."""
+        self._op = self.canonizar_operador(self.operador)
+        self._valor_lower = str(self.valor).lower()
+        self._comparar_texto = _OPERACOES_TEXTO.get(self._op, _nunca)
+        self._resultados = {}
+
+        try:
+            self._num = float(self.valor)
+        except (ValueError, TypeError):
+            self._num = None
+        self._limites = None
+        if self._op == 'entre' and self._num is not None and self.valor_secundario is not None:
+            try:
+                valor_sec = float(self.valor_secundario)
+                self._limites = (min(self._num, valor_sec), max(self._num, valor_sec))
+            except (ValueError, TypeError):
+                pass
+
+    @classmethod
+    def canonizar_operador(cls, operador: str) -> str:
+        """
+        Converte um rótulo de operador (ex: 'Contém') na chave correspondente.
+
+        Args:
+            operador: Chave ou rótulo do operador
+
+        Returns:
+            Chave canônica (ex: 'contem') ou o próprio valor se desconhecido
+        """
+        for mapa in (cls.OPERADORES_TEXT, cls.OPERADORES_NUM):
+            if operador in mapa:
+                return operador
+            for chave, rotulo in mapa.items():
+                if operador == rotulo:
+                    return chave
+        return operador
+
+    @property
+    def operador_canonico(self) -> str:
+        """Chave canônica do operador."""
+        return self._op
+
+    @property
+    def valor_lower(self) -> str:
+        """Valor do filtro em minúsculas (usado nas comparações de texto)."""
+        return self._valor_lower
+
     def verificar(self, suporte: SuporteData) -> bool:
         """
         Verifica se o suporte atende ao filtro.
@@ -160,75 +283,73 @@ class FiltroBusca:
         Returns:
             True se atende ao filtro
         """
-        valor_alvo = None
-
-        # Determina o valor alvo baseado no campo
-        if self.campo == 'tag':
-            valor_alvo = suporte.tag
-        elif self.campo == 'tipo':
-            valor_alvo = suporte.tipo
-        elif self.campo == 'layer':
-            valor_alvo = suporte.layer
-        elif self.campo in suporte.propriedades:
-            valor_alvo = suporte.propriedades[self.campo]
+        # Campos fixos são sempre texto e já têm a versão em minúsculas
+        campo = self.campo
+        if campo == 'tag':
+            valor_alvo = suporte.tag_lower
+        elif campo == 'tipo':
+            valor_alvo = suporte.tipo_lower
+        elif campo == 'layer':
+            valor_alvo = suporte.layer_lower
+        elif campo in suporte.propriedades:
+            valor_alvo = suporte.propriedades[campo]
         else:
             return False
 
-        # Aplica operação baseada no tipo de valor
-        if isinstance(valor_alvo, (int, float)) and self.operador in self.OPERADORES_NUM.values():
+        # Valores repetidos reaproveitam o resultado anterior. A chave inclui o
+        # tipo: 1, 1.0 e True têm o mesmo hash, mas str() diferente
+        chave = (type(valor_alvo), valor_alvo)
+        try:
+            return self._resultados[chave]
+        except (KeyError, TypeError):
+            pass
+
+        resultado = self._avaliar(valor_alvo)
+        if len(self._resultados) >= self.MAX_RESULTADOS:
+            self._resultados.clear()
+        try:
+            self._resultados[chave] = resultado
+        except TypeError:
+            pass  # valor não hashable (ex: lista)
+        return resultado
+
+    def _avaliar(self, valor_alvo: Any) -> bool:
+        """Aplica a operação conforme o tipo do valor alvo."""
+        if isinstance(valor_alvo, (int, float)) and self._op in self.OPERADORES_NUM:
             return self._verificar_numerico(valor_alvo)
-        else:
-            return self._verificar_texto(str(valor_alvo))
-
-    def _verificar_texto(self, valor_alvo: str) -> bool:
-        """Verifica filtro para valores de texto."""
-        valor_filtro = str(self.valor).lower()
-        valor_alvo_lower = valor_alvo.lower()
-
-        if self.operador == 'contem' or self.operador == self.OPERADORES_TEXT['contem']:
-            return valor_filtro in valor_alvo_lower
-        elif self.operador == 'nao_contem' or self.operador == self.OPERADORES_TEXT['nao_contem']:
-            return valor_filtro not in valor_alvo_lower
-        elif self.operador == 'inicia_com' or self.operador == self.OPERADORES_TEXT['inicia_com']:
-            return valor_alvo_lower.startswith(valor_filtro)
-        elif self.operador == 'termina_com' or self.operador == self.OPERADORES_TEXT['termina_com']:
-            return valor_alvo_lower.endswith(valor_filtro)
-        elif self.operador == 'igual' or self.operador == self.OPERADORES_TEXT['igual']:
-            return valor_alvo_lower == valor_filtro
-        elif self.operador == 'diferente' or self.operador == self.OPERADORES_TEXT['diferente']:
-            return valor_alvo_lower != valor_filtro
-        return False
+        return self._comparar_texto(str(valor_alvo).lower(), self._valor_lower)
 
     def _verificar_numerico(self, valor_alvo: float) -> bool:
         """Verifica filtro para valores numéricos."""
-        try:
-            valor_filtro = float(self.valor)
-        except (ValueError, TypeError):
+        if not self.numerico_valido:
             return False
+        return bool(self.comparar_numerico(valor_alvo))
 
-        if self.operador == 'igual' or self.operador == self.OPERADORES_NUM['igual']:
-            return valor_alvo == valor_filtro
-        elif self.operador == 'maior' or self.operador == self.OPERADORES_NUM['maior']:
-            return valor_alvo > valor_filtro
-        elif self.operador == 'menor' or self.operador == self.OPERADORES_NUM['menor']:
-            return valor_alvo < valor_filtro
-        elif self.operador == 'maior_igual' or self.operador == self.OPERADORES_NUM['maior_igual']:
-            return valor_alvo >= valor_filtro
-        elif self.operador == 'menor_igual' or self.operador == self.OPERADORES_NUM['menor_igual']:
-            return valor_alvo <= valor_filtro
-        elif self.operador == 'entre' or self.operador == self.OPERADORES_NUM['entre']:
-            if self.valor_secundario is None:
-                return False
-            try:
-                valor_sec = float(self.valor_secundario)
-                return min(valor_filtro, valor_sec) <= valor_alvo <= max(valor_filtro, valor_sec)
-            except (ValueError, TypeError):
-                return False
-        return False
+    @property
+    def numerico_valido(self) -> bool:
+        """True se o filtro tem operador e valor(es) numéricos válidos."""
+        return self._num is not None and (self._op in _OPERACOES_NUM or self._limites is not None)
+
+    def comparar_numerico(self, valores: Any) -> Any:
+        """
+        Aplica o operador numérico a um valor ou a um array NumPy inteiro.
+
+        Só deve ser chamado quando numerico_valido for True.
+
+        Args:
+            valores: Número ou array de números
+
+        Returns:
+            bool ou máscara booleana
+        """
+        if self._limites is not None:
+            minimo, maximo = self._limites
+            return (valores >= minimo) & (valores <= maximo)
+        return _OPERACOES_NUM[self._op](valores, self._num)
 
     def __str__(self) -> str:
         """Representação textual do filtro."""
-        operador_label = self.OPERADORES_TEXT.get(self.operador, self.OPERADORES_NUM.get(self.operador, self.operador))
-        if self.operador == 'entre' and self.valor_secundario:
+        operador_label = self.OPERADORES_TEXT.get(self._op, self.OPERADORES_NUM.get(self._op, self.operador))
+        if self._op == 'entre' and self.valor_secundario:
             return f"{self.campo} {operador_label} {self.valor} e {self.valor_secundario}"
         return f"{self.campo} {operador_label} {self.valor}"
@@ -1,10 +1,22 @@
 """Repositório de suportes AutoCAD."""
 
-from typing import Any, Dict, List, Optional, Tuple
+import logging
+from bisect import bisect_left
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import ahocorasick  # opcional: vários 'contém' na mesma coluna em uma passada
+except ImportError:
+    ahocorasick = None
 
 from core.models import SuporteData, FiltroBusca
 from utils.autocad_connector import AutocadCOMConnector
 
+logger = logging.getLogger(__name__)
+
 
 class SuporteRepository:
     """
@@ -19,6 +31,27 @@ class SuporteRepository:
         self._connector = AutocadCOMConnector()
         self._cache: List[SuporteData] = []
         self._cache_dirty = True
+        # Índices colunares (SoA) sobre o cache, reconstruídos a cada recarga
+        self._pos = np.empty((0, 3), dtype=np.float64)
+        self._tags: List[str] = []
+        self._tipos: List[str] = []
+        self._layers: List[str] = []
+        self._handle_idx: Dict[str, int] = {}
+        # Tag em maiúsculas -> índice da primeira ocorrência no cache
+        self._tag_idx: Dict[str, int] = {}
+        # Colunas de texto em minúsculas para o avaliador vetorizado de filtros
+        self._texto_lower: Dict[str, np.ndarray] = {}
+        # Colunas ordenadas (valores, permutação) para 'inicia_com' por bisect, montadas sob demanda
+        self._ordenados: Dict[str, Tuple[List[str], np.ndarray]] = {}
+        # As mesmas colunas em bytes (dtype 'S'), só quando todo o texto é ASCII
+        self._texto_ascii: Dict[str, np.ndarray] = {}
+        # Handles de blocos dinâmicos e se as propriedades deles já foram lidas
+        self._handles_dinamicos: List[str] = []
+        self._propriedades_carregadas = True
+        # Agregados (tipos, camadas, propriedades, contagens) calculados em uma passada
+        self._agregados: Optional[Dict[str, Any]] = None
+        # Autômatos Aho-Corasick já montados, por tupla de trechos procurados
+        self._automatos: Dict[Tuple[str, ...], Any] = {}
 
     @property
     def is_connected(self) -> bool:
@@ -47,8 +80,56 @@ class SuporteRepository:
         """Desconecta do AutoCAD."""
         self._connector.desconectar()
         self._cache.clear()
+        self._reconstruir_indices()
         self._cache_dirty = True
 
+    def _reconstruir_indices(self) -> None:
+        """Reconstrói as colunas e os índices por handle/tag a partir do cache."""
+        self._agregados = None
+        n = len(self._cache)
+        self._pos = np.fromiter(
+            (c for s in self._cache for c in (s.posicao_x, s.posicao_y, s.posicao_z)),
+            dtype=np.float64,
+            count=3 * n
+        ).reshape(n, 3)
+        self._tags = [s.tag for s in self._cache]
+        self._tipos = [s.tipo for s in self._cache]
+        self._layers = [s.layer for s in self._cache]
+        self._handle_idx = {s.handle: i for i, s in enumerate(self._cache)}
+        self._tag_idx = {}
+        tag_idx_setdefault = self._tag_idx.setdefault
+        for i, tag in enumerate(self._tags):
+            tag_idx_setdefault(tag.upper(), i)
+        self._texto_lower = {
+            campo: np.array([v.lower() for v in valores], dtype=str)
+            for campo, valores in (('tag', self._tags), ('tipo', self._tipos), ('layer', self._layers))
+        }
+        self._ordenados = {}
+        self._texto_ascii = {}
+        for campo, coluna in self._texto_lower.items():
+            valores = coluna.tolist()
+            if all(v.isascii() for v in valores):
+                self._texto_ascii[campo] = np.array([v.encode('ascii') for v in valores], dtype=bytes)
+
+    def _garantir_cache(self, com_propriedades: bool = True) -> bool:
+        """
+        Garante o cache carregado sem copiar a lista.
+
+        Args:
+            com_propriedades: Se False, não força a leitura das propriedades
+                dinâmicas (para consultas só de tag/tipo/camada/posição)
+
+        Returns:
+            True se conectado (cache utilizável)
+        """
+        if not self._connector.is_connected:
+            return False
+        if self._cache_dirty:
+            self._recarregar()
+        if com_propriedades:
+            self.precarregar_propriedades()
+        return True
+
     def obter_info_documento(self) -> Dict[str, Any]:
         """
         Obtém informações sobre o documento AutoCAD atual.
@@ -56,47 +137,43 @@ class SuporteRepository:
         Returns:
             Dicionário com informações do documento
         """
-        print("[DEBUG] obter_info_documento: Obtendo informações do documento")
+        logger.debug("obter_info_documento: Obtendo informações do documento")
         info = self._connector.obter_info_documento()
-        print(f"[DEBUG] obter_info_documento: {info}")
+        logger.debug("obter_info_documento: %s", info)
         return info
 
-    def listar_todos(self, forcar_recarga: bool = False) -> List[SuporteData]:
+    def listar_todos(self, forcar_recarga: bool = False, carregar_propriedades: bool = True) -> List[SuporteData]:
         """
         Lista todos os suportes do AutoCAD.
 
         Args:
             forcar_recarga: Se True, ignora o cache e recarrega
+            carregar_propriedades: Se False, adia a leitura das propriedades
+                dinâmicas (feita depois por precarregar_propriedades ou pela
+                próxima chamada com True)
 
         Returns:
             Lista de SuporteData
         """
-        print(f"[DEBUG] listar_todos: forcar_recarga={forcar_recarga}, cache_dirty={self._cache_dirty}")
-
         if not self.is_connected:
-            print("[DEBUG] listar_todos: Não conectado")
+            logger.debug("listar_todos: Não conectado")
             return []
 
-        if not self._cache_dirty and not forcar_recarga:
-            print(f"[DEBUG] listar_todos: Retornando cache ({len(self._cache)} suportes)")
-            return self._cache.copy()
+        if self._cache_dirty or forcar_recarga:
+            self._recarregar()
+
+        if carregar_propriedades:
+            self.precarregar_propriedades()
+        return self._cache.copy()
 
-        print("[DEBUG] listar_todos: Cache inválido, recarregando do AutoCAD...")
+    def _recarregar(self) -> None:
+        """Relê os blocos do AutoCAD (sem propriedades dinâmicas) e refaz os índices."""
+        logger.debug("listar_todos: Cache inválido, recarregando do AutoCAD...")
         blocos = self._connector.listar_blocos_suporte()
-        print(f"[DEBUG] listar_todos: {len(blocos)} blocos retornados pelo conector")
+        logger.debug("listar_todos: %s blocos retornados pelo conector", len(blocos))
 
         self._cache.clear()
         for bloco in blocos:
-            # Carrega propriedades dinâmicas se for bloco dinâmico
-            propriedades = {}
-            if bloco.get('is_dynamic'):
-                propriedades_raw = self._connector.obter_propriedades_bloco(bloco['handle'])
-                # Extrai apenas os valores
-                propriedades = {
-                    k: v.get('valor', v) if isinstance(v, dict) else v
-                    for k, v in propriedades_raw.items()
-                }
-
             suporte = SuporteData(
                 tag=bloco['tag'],
                 tipo=bloco['tipo'],
@@ -104,14 +181,52 @@ class SuporteRepository:
                 posicao_y=bloco['posicao_y'],
                 posicao_z=bloco['posicao_z'],
                 handle=bloco['handle'],
-                propriedades=propriedades,
                 layer=bloco.get('layer', '')
             )
             self._cache.append(suporte)
+        self._handles_dinamicos = [b['handle'] for b in blocos if b.get('is_dynamic')]
+        self._propriedades_carregadas = not self._handles_dinamicos
 
+        self._reconstruir_indices()
         self._cache_dirty = False
-        print(f"[DEBUG] listar_todos: {len(self._cache)} suportes no cache")
-        return self._cache.copy()
+        logger.debug("listar_todos: %s suportes no cache", len(self._cache))
+
+    def precarregar_propriedades(self) -> None:
+        """
+        Lê as propriedades dinâmicas pendentes do cache em uma única chamada.
+
+        Não faz nada se já foram carregadas desde a última recarga.
+        """
+        if self._propriedades_carregadas or not self.is_connected:
+            return
+
+        # Propriedades dinâmicas de todos os blocos em uma única chamada ao conector
+        propriedades_por_handle = self._connector.obter_propriedades_blocos(self._handles_dinamicos)
+
+        for handle, propriedades_raw in propriedades_por_handle.items():
+            indice = self._handle_idx.get(handle)
+            if indice is None:
+                continue
+            # Extrai apenas os valores
+            for k, v in propriedades_raw.items():
+                self._cache[indice].definir_propriedade(k, v.get('valor', v) if isinstance(v, dict) else v)
+
+        self._propriedades_carregadas = True
+        self._agregados = None
+
+    def visao_todos(self) -> Sequence[SuporteData]:
+        """
+        Retorna o cache de suportes sem copiá-lo.
+
+        A sequência é somente leitura por convenção e é reaproveitada na
+        próxima recarga; quem precisar guardar o resultado deve usar listar_todos().
+
+        Returns:
+            Sequência de SuporteData (vazia se não conectado)
+        """
+        if not self._garantir_cache():
+            return ()
+        return self._cache
 
     def buscar_por_filtro(self, filtros: List[FiltroBusca]) -> List[SuporteData]:
         """
@@ -123,17 +238,188 @@ class SuporteRepository:
         Returns:
             Lista de SuporteData filtrada
         """
-        suportes = self.listar_todos()
-
         if not filtros:
-            return suportes
+            return self.listar_todos()
 
-        resultado = suportes.copy()
+        mascara = self.buscar_por_filtro_mask(filtros)
+        # Os suportes devolvidos saem completos (com propriedades dinâmicas)
+        self.precarregar_propriedades()
+        return [self._cache[i] for i in np.flatnonzero(mascara)]
 
-        for filtro in filtros:
-            resultado = [s for s in resultado if filtro.verificar(s)]
+    def buscar_por_filtro_mask(self, filtros: List[FiltroBusca]) -> np.ndarray:
+        """
+        Avalia os filtros sobre o cache inteiro de uma vez.
 
-        return resultado
+        Filtros de texto em tag/tipo/layer viram operações NumPy sobre as colunas
+        em minúsculas; filtros de propriedades dinâmicas (tipos mistos) usam
+        FiltroBusca.verificar por suporte.
+
+        Args:
+            filtros: Lista de filtros (combinados com E)
+
+        Returns:
+            Máscara booleana alinhada com o cache
+        """
+        if not self._garantir_cache(com_propriedades=False):
+            return np.zeros(0, dtype=bool)
+
+        n = len(self._cache)
+        mascaras = []
+        restantes = list(filtros)
+
+        # Vários 'contém'/'não contém' na mesma coluna: uma única passada Aho-Corasick
+        if ahocorasick is not None:
+            grupos: Dict[str, List[FiltroBusca]] = {}
+            for filtro in filtros:
+                if (filtro.campo in self._texto_lower and filtro.valor_lower
+                        and filtro.operador_canonico in ('contem', 'nao_contem')):
+                    grupos.setdefault(filtro.campo, []).append(filtro)
+            for campo, grupo in grupos.items():
+                if len(grupo) < 2:
+                    continue
+                mascaras.extend(self._mascaras_aho_corasick(campo, grupo, n))
+                restantes = [f for f in restantes if f not in grupo]
+
+        mascaras.extend(self._mascara_filtro(filtro, n) for filtro in restantes)
+        if not mascaras:
+            return np.ones(n, dtype=bool)
+        return np.logical_and.reduce(mascaras)
+
+    def _mascaras_aho_corasick(self, campo: str, grupo: List[FiltroBusca], n: int) -> List[np.ndarray]:
+        """
+        Avalia vários filtros 'contém'/'não contém' de uma coluna em uma passada.
+
+        Args:
+            campo: Coluna de texto (tag, tipo ou layer)
+            grupo: Filtros de substring sobre a coluna
+            n: Tamanho do cache
+
+        Returns:
+            Uma máscara por filtro, na ordem do grupo
+        """
+        trechos = tuple(sorted({f.valor_lower for f in grupo}))
+        automato = self._automatos.get(trechos)
+        if automato is None:
+            automato = ahocorasick.Automaton()
+            for bit, trecho in enumerate(trechos):
+                automato.add_word(trecho, 1 << bit)
+            automato.make_automaton()
+            if len(self._automatos) >= 32:
+                self._automatos.clear()
+            self._automatos[trechos] = automato
+
+        # Bits dos trechos encontrados em cada linha
+        acertos = []
+        for texto in self._texto_lower[campo].tolist():
+            bits = 0
+            for _, bit in automato.iter(texto):
+                bits |= bit
+            acertos.append(bits)
+        acertos = np.array(acertos, dtype=object)
+
+        mascaras = []
+        for filtro in grupo:
+            contem = (acertos & (1 << trechos.index(filtro.valor_lower))).astype(bool)
+            mascaras.append(contem if filtro.operador_canonico == 'contem' else ~contem)
+        return mascaras
+
+    def _mascara_filtro(self, filtro: FiltroBusca, n: int) -> np.ndarray:
+        """Máscara de um único filtro (ver buscar_por_filtro_mask)."""
+        coluna = self._texto_lower.get(filtro.campo)
+        if coluna is None:
+            self.precarregar_propriedades()
+            if filtro.operador_canonico in FiltroBusca.OPERADORES_NUM and filtro.numerico_valido:
+                return self._mascara_numerica(filtro, n)
+            return np.fromiter((filtro.verificar(s) for s in self._cache), dtype=bool, count=n)
+
+        valor = filtro.valor_lower
+        op = filtro.operador_canonico
+        if op == 'inicia_com' and valor and valor[-1] != '\U0010ffff':
+            return self._mascara_prefixo(filtro.campo, valor, n)
+
+        coluna_ascii = self._texto_ascii.get(filtro.campo)
+        if coluna_ascii is not None:
+            # Busca em bytes (1 byte por caractere). Um valor não-ASCII em UTF-8
+            # só tem bytes >= 0x80, que nunca ocorrem na coluna: o resultado é o mesmo.
+            coluna = coluna_ascii
+            valor = valor.encode('utf-8')
+
+        if op == 'contem':
+            return np.char.find(coluna, valor) >= 0
+        elif op == 'nao_contem':
+            return np.char.find(coluna, valor) < 0
+        elif op == 'inicia_com':
+            return np.char.startswith(coluna, valor)
+        elif op == 'termina_com':
+            return np.char.endswith(coluna, valor)
+        elif op == 'igual':
+            return coluna == valor
+        elif op == 'diferente':
+            return coluna != valor
+        return np.zeros(n, dtype=bool)
+
+    def _mascara_numerica(self, filtro: FiltroBusca, n: int) -> np.ndarray:
+        """
+        Máscara de um filtro numérico sobre uma propriedade dinâmica.
+
+        Valores numéricos são comparados de uma vez em um array float64; os
+        demais (texto) seguem por FiltroBusca.verificar, e suportes sem a
+        propriedade ficam de fora.
+
+        Args:
+            filtro: Filtro com operador numérico válido
+            n: Tamanho do cache
+
+        Returns:
+            Máscara booleana alinhada com o cache
+        """
+        campo = filtro.campo
+        indices_num = []
+        valores_num = []
+        outros = []
+        for i, suporte in enumerate(self._cache):
+            propriedades = suporte.propriedades
+            if campo in propriedades:
+                valor = propriedades[campo]
+                if isinstance(valor, (int, float)):
+                    indices_num.append(i)
+                    valores_num.append(valor)
+                else:
+                    outros.append(i)
+
+        mascara = np.zeros(n, dtype=bool)
+        if indices_num:
+            mascara[indices_num] = filtro.comparar_numerico(np.array(valores_num, dtype=np.float64))
+        for i in outros:
+            mascara[i] = filtro.verificar(self._cache[i])
+        return mascara
+
+    def _mascara_prefixo(self, campo: str, prefixo: str, n: int) -> np.ndarray:
+        """
+        Máscara de 'inicia_com' por busca binária na coluna ordenada.
+
+        Args:
+            campo: Coluna de texto (tag, tipo ou layer)
+            prefixo: Prefixo em minúsculas (não vazio)
+            n: Tamanho do cache
+
+        Returns:
+            Máscara booleana alinhada com o cache
+        """
+        ordenado = self._ordenados.get(campo)
+        if ordenado is None:
+            coluna = self._texto_lower[campo]
+            permutacao = np.argsort(coluna, kind='stable')
+            ordenado = (coluna[permutacao].tolist(), permutacao)
+            self._ordenados[campo] = ordenado
+        valores, permutacao = ordenado
+
+        # Todos os valores com o prefixo ficam entre o prefixo e o "próximo" prefixo
+        inicio = bisect_left(valores, prefixo)
+        fim = bisect_left(valores, prefixo[:-1] + chr(ord(prefixo[-1]) + 1), inicio)
+        mascara = np.zeros(n, dtype=bool)
+        mascara[permutacao[inicio:fim]] = True
+        return mascara
 
     def buscar_por_tag(self, tag: str) -> Optional[SuporteData]:
         """
@@ -145,13 +431,11 @@ class SuporteRepository:
         Returns:
             SuporteData ou None se não encontrado
         """
-        suportes = self.listar_todos()
-
-        for suporte in suportes:
-            if suporte.tag.upper() == tag.upper():
-                return suporte
+        if not self._garantir_cache():
+            return None
 
-        return None
+        indice = self._tag_idx.get(tag.upper())
+        return self._cache[indice] if indice is not None else None
 
     def buscar_por_handle(self, handle: str) -> Optional[SuporteData]:
         """
@@ -163,13 +447,11 @@ class SuporteRepository:
         Returns:
             SuporteData ou None se não encontrado
         """
-        suportes = self.listar_todos()
+        if not self._garantir_cache():
+            return None
 
-        for suporte in suportes:
-            if suporte.handle == handle:
-                return suporte
-
-        return None
+        indice = self._handle_idx.get(handle)
+        return self._cache[indice] if indice is not None else None
 
     def obter_propriedades(self, handle: str) -> Dict[str, Any]:
         """
@@ -224,14 +506,27 @@ class SuporteRepository:
         sucesso, mensagem = self._connector.atualizar_propriedade(handle, propriedade, valor)
 
         if sucesso:
-            # Atualiza o cache se existir
-            for suporte in self._cache:
-                if suporte.handle == handle:
-                    suporte.definir_propriedade(propriedade, valor)
-                    break
+            self._aplicar_no_cache([handle], propriedade, valor)
 
         return sucesso, mensagem
 
+    def _aplicar_no_cache(self, handles: List[str], propriedade: str, valor: Any) -> None:
+        """
+        Replica no cache uma propriedade já gravada no AutoCAD.
+
+        Args:
+            handles: Handles atualizados com sucesso
+            propriedade: Nome da propriedade
+            valor: Valor gravado
+        """
+        handle_idx = self._handle_idx
+        cache = self._cache
+        self._agregados = None
+        for handle in handles:
+            indice = handle_idx.get(handle)
+            if indice is not None:
+                cache[indice].definir_propriedade(propriedade, valor)
+
     def atualizar_lote(
         self,
         handles: List[str],
@@ -270,10 +565,12 @@ class SuporteRepository:
             ]
             return stats
 
-        for handle in handles:
-            sucesso, mensagem = self.atualizar_propriedade(handle, propriedade, valor)
+        resultados = self._connector.atualizar_propriedades(handles, propriedade, valor)
 
+        atualizados = []
+        for handle, (sucesso, mensagem) in zip(handles, resultados):
             if sucesso:
+                atualizados.append(handle)
                 stats['sucesso'] += 1
                 stats['detalhes'].append({
                     'handle': handle,
@@ -288,6 +585,9 @@ class SuporteRepository:
                     'erro': mensagem
                 })
 
+        # Cache atualizado uma vez, depois de todas as gravações no AutoCAD
+        self._aplicar_no_cache(atualizados, propriedade, valor)
+
         return stats
 
     def zoom_para_suporte(self, handle: str, margem: float = 200) -> Tuple[bool, str]:
@@ -329,9 +629,9 @@ class SuporteRepository:
         Returns:
             Lista de tipos
         """
-        suportes = self.listar_todos()
-        tipos = sorted(set(s.tipo for s in suportes))
-        return tipos
+        if not self._garantir_cache(com_propriedades=False):
+            return []
+        return list(self._obter_agregados()['tipos_ordenados'])
 
     def listar_camadas(self) -> List[str]:
         """
@@ -340,9 +640,9 @@ class SuporteRepository:
         Returns:
             Lista de camadas
         """
-        suportes = self.listar_todos()
-        camadas = sorted(set(s.layer for s in suportes if s.layer))
-        return camadas
+        if not self._garantir_cache(com_propriedades=False):
+            return []
+        return list(self._obter_agregados()['camadas_ordenadas'])
 
     def listar_propriedades_disponiveis(self) -> List[str]:
         """
@@ -351,13 +651,9 @@ class SuporteRepository:
         Returns:
             Lista de nomes de propriedades
         """
-        suportes = self.listar_todos()
-        propriedades = set()
-
-        for suporte in suportes:
-            propriedades.update(suporte.listar_nomes_propriedades())
-
-        return sorted(propriedades)
+        if not self._garantir_cache():
+            return []
+        return list(self._obter_agregados()['propriedades'])
 
     def obter_estatisticas(self) -> Dict[str, Any]:
         """
@@ -366,9 +662,7 @@ class SuporteRepository:
         Returns:
             Dicionário com estatísticas
         """
-        suportes = self.listar_todos()
-
-        if not suportes:
+        if not self._garantir_cache(com_propriedades=False) or not self._cache:
             return {
                 'total': 0,
                 'tipos': {},
@@ -376,20 +670,43 @@ class SuporteRepository:
                 'media_posicao': {'x': 0, 'y': 0, 'z': 0}
             }
 
-        tipos = {}
-        camadas = {}
+        agregados = self._obter_agregados()
+        media_x, media_y, media_z = agregados['media']
+        return {
+            'total': len(self._cache),
+            'tipos': dict(agregados['tipos']),
+            'camadas': dict(agregados['camadas']),
+            'media_posicao': {'x': media_x, 'y': media_y, 'z': media_z}
+        }
 
-        for s in suportes:
-            tipos[s.tipo] = tipos.get(s.tipo, 0) + 1
-            camadas[s.layer] = camadas.get(s.layer, 0) + 1
+    def _obter_agregados(self) -> Dict[str, Any]:
+        """
+        Calcula (uma vez por recarga) os agregados usados pelos painéis.
 
-        return {
-            'total': len(suportes),
+        As contagens por tipo e camada saem das colunas, a média das posições
+        do array (n, 3); as listas ordenadas derivam das contagens.
+
+        Returns:
+            Dicionário com 'tipos', 'camadas', 'tipos_ordenados',
+            'camadas_ordenadas', 'propriedades' e 'media'
+        """
+        if self._agregados is not None:
+            return self._agregados
+
+        # Contagens direto das colunas (Counter conta em C)
+        tipos = Counter(self._tipos)
+        camadas = Counter(self._layers)
+        propriedades = set()
+        for suporte in self._cache:
+            propriedades.update(suporte.nomes_propriedades)
+
+        media = self._pos.mean(axis=0).tolist() if len(self._pos) else [0, 0, 0]
+        self._agregados = {
             'tipos': tipos,
             'camadas': camadas,
-            'media_posicao': {
-                'x': sum(s.posicao_x for s in suportes) / len(suportes),
-                'y': sum(s.posicao_y for s in suportes) / len(suportes),
-                'z': sum(s.posicao_z for s in suportes) / len(suportes)
-            }
+            'tipos_ordenados': sorted(tipos),
+            'camadas_ordenadas': sorted(layer for layer in camadas if layer),
+            'propriedades': sorted(propriedades),
+            'media': media,
         }
+        return self._agregados
@@ -1,21 +1,42 @@
+import hashlib
+import importlib.util
+import json
+import math
 import os
+import shutil
 import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
 
+import numpy as np
 import pandas as pd
-from PySide6.QtCore import Qt, QThread, Signal
+from PySide6.QtCore import Qt, QThread, QTimer, Signal
 from PySide6.QtGui import QFont
 from PySide6.QtWidgets import (QApplication, QCheckBox, QFileDialog, QHBoxLayout,
                                QLabel, QMainWindow, QMessageBox, QProgressBar,
-                               QPushButton, QSplitter, QTextEdit, QVBoxLayout,
+                               QPlainTextEdit, QPushButton, QSplitter, QVBoxLayout,
                                QWidget)
 
 import ezdxf
 from ezdxf.addons.drawing import RenderContext, Frontend
 from ezdxf.addons.drawing.matplotlib import MatplotlibBackend
-import matplotlib
-matplotlib.use('Qt5Agg')
-import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+# PDF vetorial direto do ezdxf (opcional: requer PyMuPDF); sem ele usa matplotlib
+if importlib.util.find_spec("pymupdf") is not None:
+    try:
+        from ezdxf.addons.drawing import layout as draw_layout
+        from ezdxf.addons.drawing.pymupdf import PyMuPdfBackend
+    except ImportError:
+        # ezdxf < 1.1 não tem o backend PyMuPDF
+        draw_layout = None
+        PyMuPdfBackend = None
+else:
+    draw_layout = None
+    PyMuPdfBackend = None
 
 
 class ProcessingConfig:
@@ -28,6 +49,9 @@ class ProcessingConfig:
                         'MEDIDA_L2', 'MEDIDA_B',
                         'NUM_DOC', 'QTD', 'CLIENTE']
 
+    # Colunas lidas do Excel ('Name' é renomeada para TipoSuporte)
+    EXCEL_COLUMNS = REQUIRED_COLUMNS + ['Name']
+
     # Mapeamento de atributos do DXF
     ATTRIBUTE_TAGS = ["POSICAO", "TIPOSUPORTE", "ELEVACAO",
                       "H", "L", "M", "H1", "H2", "L1", "L2", "B", "DATA_ATUAL",
@@ -37,6 +61,22 @@ class ProcessingConfig:
     TEMPLATE_EXTENSION = ".dxf"
     OUTPUT_EXTENSION = ".dxf"
 
+    # Pool de processos: número de processos (None = os.cpu_count()) e documentos por tarefa
+    MAX_WORKERS = None
+    CHUNK_SIZE = 32
+
+    # Buffer de escrita dos arquivos gerados (DXF/PDF): menos chamadas write
+    WRITE_BUFFER_SIZE = 1 << 20
+
+    # Cache de saídas (ao lado do Excel): pula DXF cujo template e dados não mudaram
+    OUTPUT_CACHE_FILE = ".dxf_cache.json"
+
+    # Linhas mantidas no log da janela (as mais antigas são descartadas)
+    LOG_MAX_LINES = 5000
+
+    # Página do PDF (largura, altura) em mm - A4 retrato
+    PDF_PAGE_SIZE_MM = (210, 297)
+
 
 class ProcessingStats:
     """Gerencia estatísticas do processamento."""
@@ -56,8 +96,18 @@ class ProcessingStats:
         self.duplicate_details = []
         self.pdf_failed_details = []
 
+    @staticmethod
+    def _details_text(details):
+        """Junta uma lista de detalhes no texto do relatório ("  - item" por linha)."""
+        return "\n".join(f"  - {detail}" for detail in details)
+
     def to_dict(self):
-        """Converte para dicionário para sinal."""
+        """
+        Converte para dicionário para sinal.
+
+        Os textos *_details_text já vêm montados aqui, na thread do worker,
+        para o relatório final não formatar listas longas na thread da GUI.
+        """
         return {
             "total": self.total,
             "success": self.success,
@@ -71,10 +121,233 @@ class ProcessingStats:
             "not_found_details": self.not_found_details,
             "no_attributes_details": self.no_attributes_details,
             "duplicate_details": self.duplicate_details,
-            "pdf_failed_details": self.pdf_failed_details
+            "pdf_failed_details": self.pdf_failed_details,
+            "error_details_text": self._details_text(self.error_details),
+            "not_found_details_text": self._details_text(self.not_found_details),
+            "no_attributes_details_text": self._details_text(self.no_attributes_details),
+            "duplicate_details_text": self._details_text(self.duplicate_details),
+            "pdf_failed_details_text": self._details_text(self.pdf_failed_details),
         }
 
 
+# Tags do mapeamento (já em maiúsculas), para evitar upper() por atributo
+_ATTRIBUTE_TAG_SET = frozenset(ProcessingConfig.ATTRIBUTE_TAGS)
+
+# Formato de data/hora dos cabeçalhos e rodapés do log
+_TS_FMT = '%d/%m/%Y %H:%M:%S'
+
+
+def write_dxf(doc, output_path):
+    """
+    Salva o documento como DXF ASCII com buffer de escrita grande.
+
+    Equivale a doc.saveas(output_path), mas com WRITE_BUFFER_SIZE em vez do
+    buffer padrão de 8 KiB.
+
+    Args:
+        doc: Documento ezdxf
+        output_path: Caminho do DXF de saída
+    """
+    with open(output_path, 'wt', encoding=doc.output_encoding, errors='dxfreplace',
+              buffering=ProcessingConfig.WRITE_BUFFER_SIZE) as f:
+        doc.write(f)
+
+
+def collect_attributes(doc):
+    """
+    Localiza os atributos de blocos (INSERT) dos layouts PaperSpace.
+
+    Feito uma vez por template lido; o preenchimento de cada registro
+    percorre apenas a lista retornada.
+
+    Args:
+        doc: Documento ezdxf (template já lido)
+
+    Returns:
+        Tuple (found_attributes, [(attrib, TAG em maiúsculas)])
+    """
+    found_attributes = False
+    attributes = []
+
+    for layout in doc.layouts:
+        if layout.name == "Model":
+            continue
+
+        # Busca entidades INSERT (block references) com atributos
+        for entity in layout.query('INSERT'):
+            try:
+                for attrib in entity.attribs:
+                    found_attributes = True
+                    # Tags já no formato esperado dispensam str()/upper()
+                    tag_value = attrib.dxf.tag
+                    if tag_value in _ATTRIBUTE_TAG_SET:
+                        attributes.append((attrib, tag_value))
+                    elif tag_value is not None:
+                        attributes.append((attrib, str(tag_value).upper()))
+            except Exception:
+                # Ignora erros em atributos individuais
+                pass
+
+    return found_attributes, attributes
+
+
+def fill_document(doc, output_path, attribute_mapping, attributes=None):
+    """
+    Preenche os atributos de um documento DXF já carregado e salva em output_path.
+
+    O documento pode ser reaproveitado para o próximo registro: todos os
+    atributos mapeados são sobrescritos a cada chamada.
+
+    Args:
+        doc: Documento ezdxf (template já lido)
+        output_path: Caminho de saída do DXF modificado
+        attribute_mapping: Dicionário {tag: valor} para preencher atributos
+        attributes: Resultado de collect_attributes(doc), se já calculado
+
+    Returns:
+        Tuple (success, attr_count, error_message)
+    """
+    try:
+        if attributes is None:
+            attributes = collect_attributes(doc)
+        found_attributes, targets = attributes
+
+        attr_count = 0
+        for attrib, tag in targets:
+            if tag in attribute_mapping:
+                attrib.dxf.text = attribute_mapping[tag]
+                attr_count += 1
+
+        # Verifica se encontrou e modificou atributos
+        if not found_attributes or attr_count == 0:
+            return False, 0, "Sem atributos encontrados"
+
+        # Salva o documento modificado
+        write_dxf(doc, output_path)
+        return True, attr_count, None
+
+    except Exception as e:
+        return False, 0, str(e)
+
+
+# Figura matplotlib reaproveitada entre conversões para PDF (uma por processo)
+_pdf_figure_cache = None
+
+
+def _pdf_figure():
+    """
+    Retorna a figura/eixo usados na conversão para PDF, já limpos.
+
+    Returns: (fig, ax)
+    """
+    global _pdf_figure_cache
+    if _pdf_figure_cache is None:
+        # Figura Agg (sem pyplot/Qt): apenas exportação, segura fora da thread da GUI
+        fig = Figure(figsize=(8.27, 11.69))  # A4 size
+        FigureCanvasAgg(fig)
+        _pdf_figure_cache = (fig, fig.add_subplot(111))
+    else:
+        _pdf_figure_cache[1].cla()
+    return _pdf_figure_cache
+
+
+def render_pdf(doc, pdf_path):
+    """
+    Gera o PDF do primeiro layout PaperSpace de um documento já carregado.
+
+    Usa o backend vetorial PyMuPDF do ezdxf quando disponível e
+    matplotlib (rasterizado a 300 dpi) caso contrário.
+
+    Args:
+        doc: Documento ezdxf (por exemplo, o recém-preenchido por fill_document)
+        pdf_path: Caminho do PDF de saída
+
+    Returns: (success, error_message)
+    """
+    try:
+        # Renderiza apenas o primeiro layout PaperSpace
+        layout = next((lay for lay in doc.layouts if lay.name != "Model"), None)
+        if layout is None:
+            return False, "Nenhum layout PaperSpace encontrado"
+
+        if PyMuPdfBackend is not None:
+            backend = PyMuPdfBackend()
+            Frontend(RenderContext(doc), backend).draw_layout(layout)
+            page = draw_layout.Page(*ProcessingConfig.PDF_PAGE_SIZE_MM, draw_layout.Units.mm)
+            with open(pdf_path, 'wb') as f:
+                f.write(backend.get_pdf_bytes(page))
+            return True, None
+
+        # Reaproveita a figura matplotlib entre conversões
+        fig, ax = _pdf_figure()
+        Frontend(RenderContext(doc), MatplotlibBackend(ax)).draw_layout(layout)
+
+        # Salva como PDF
+        with open(pdf_path, 'wb', buffering=ProcessingConfig.WRITE_BUFFER_SIZE) as f:
+            fig.savefig(f, format='pdf', bbox_inches='tight', dpi=300)
+        return True, None
+
+    except Exception as e:
+        return False, str(e)
+
+
+def process_documents(template_path, jobs):
+    """
+    Processa um lote de documentos do mesmo template (executado no pool de processos).
+
+    O template é lido uma única vez e reaproveitado para todos os jobs do lote.
+    Jobs com o mesmo mapeamento de atributos reaproveitam o DXF/PDF já gerado
+    (cópia do arquivo, sem passar pelo ezdxf). O PDF é renderizado do
+    documento em memória, sem reler o DXF salvo.
+
+    Args:
+        template_path: Caminho do template DXF
+        jobs: Lista de tuplas (output_path, attribute_mapping, pdf_path);
+            pdf_path None quando não há PDF a gerar
+
+    Returns:
+        Lista de tuplas (success, attr_count, error_message, pdf_result), na
+        ordem de jobs; pdf_result é (pdf_success, pdf_error) ou None
+    """
+    try:
+        doc = ezdxf.readfile(template_path)
+        attributes = collect_attributes(doc)
+    except Exception as e:
+        return [(False, 0, str(e), None)] * len(jobs)
+
+    results = []
+    rendered = {}  # mapeamento -> (output_path, pdf_path, resultado) do primeiro gerado
+    for output_path, attribute_mapping, pdf_path in jobs:
+        key = tuple(sorted(attribute_mapping.items()))
+        cached = rendered.get(key)
+        if cached is not None:
+            cached_output, cached_pdf, cached_result = cached
+            # Sem PDF copiável, cai no preenchimento normal: doc pode estar com
+            # os valores de outro registro e precisa ser preenchido de novo
+            pdf_copiavel = cached_pdf is not None and cached_result[3][0]
+            if pdf_path is None or pdf_copiavel:
+                try:
+                    shutil.copyfile(cached_output, output_path)
+                    pdf_result = None
+                    if pdf_path is not None:
+                        shutil.copyfile(cached_pdf, pdf_path)
+                        pdf_result = cached_result[3]
+                    results.append(cached_result[:3] + (pdf_result,))
+                    continue
+                except OSError:
+                    pass
+
+        success, attr_count, error_msg = fill_document(doc, output_path, attribute_mapping, attributes)
+        pdf_result = None
+        if success and pdf_path is not None:
+            pdf_result = render_pdf(doc, pdf_path)
+        result = (success, attr_count, error_msg, pdf_result)
+        if success:
+            rendered[key] = (output_path, pdf_path, result)
+        results.append(result)
+    return results
+
+
 class DXFConversionWorker(QThread):
     """Worker thread para conversão DWG -> DXF em lote."""
 
@@ -85,22 +358,179 @@ class DXFConversionWorker(QThread):
     current_file = Signal(str)
     cancelled = Signal()
 
+    # AcSaveAsType do AutoCAD para cada versão de DXF
+    DXF_SAVE_AS_TYPES = {
+        "R2000": 13,  # ac2000_dxf
+        "R2004": 25,  # ac2004_dxf
+        "R2007": 37,  # ac2007_dxf
+        "R2010": 49,  # ac2010_dxf
+        "R2013": 61,  # ac2013_dxf
+        "R2018": 65,  # ac2018_dxf
+    }
+
+    # Variáveis de sistema ajustadas durante a conversão (restauradas ao final)
+    QUIET_VARIABLES = {
+        "FILEDIA": 0,   # sem caixas de diálogo de arquivo
+        "CMDECHO": 0,   # sem eco de comandos
+        "CMDDIA": 0,    # sem diálogos de comando
+    }
+
+    # Intervalo mínimo (s) entre sinais de progresso/arquivo atual/log (~30 Hz)
+    EMIT_INTERVAL = 1 / 30
+    # Máximo de linhas de log acumuladas antes de enviar à GUI
+    LOG_BATCH_LINES = 50
+
     def __init__(self, source_folder, dxf_version="R2013"):
         super().__init__()
         self.source_folder = source_folder
         self.dxf_version = dxf_version
-        self._is_cancelled = False
+        # Sinalizado pela thread da GUI; lido pelo laço do worker sem trava
+        self._cancel = threading.Event()
+        self._log_buffer = []
+        self._last_log_flush = 0.0
+        self._last_progress = -1
+        self._last_progress_time = 0.0
 
     def cancel_processing(self):
         """Cancela a conversao."""
-        self._is_cancelled = True
+        self._cancel.set()
+
+    def _wait_quiescent(self, acad, timeout=1.0, interval=0.05):
+        """
+        Aguarda o AutoCAD ficar ocioso (sem comando em andamento).
+
+        Args:
+            acad: Objeto AutoCAD.Application
+            timeout: Tempo máximo de espera em segundos
+            interval: Intervalo entre verificações em segundos
+
+        Returns:
+            True se ficou ocioso dentro do tempo limite
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                if acad.GetAcadState().IsQuiescent:
+                    return True
+            except Exception:
+                pass
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(interval)
+
+    def _log(self, message):
+        """
+        Acumula uma linha de log; envia à GUI em lotes (LOG_BATCH_LINES ou EMIT_INTERVAL).
+
+        Args:
+            message: Linha de log
+        """
+        self._log_buffer.append(message)
+        if (len(self._log_buffer) >= self.LOG_BATCH_LINES
+                or time.monotonic() - self._last_log_flush >= self.EMIT_INTERVAL):
+            self._flush_log()
+
+    def _flush_log(self):
+        """Envia as linhas de log acumuladas num único sinal."""
+        if self._log_buffer:
+            self.log.emit("\n".join(self._log_buffer))
+            self._log_buffer = []
+        self._last_log_flush = time.monotonic()
+
+    def _report_progress(self, percent, current=None):
+        """
+        Emite progresso/arquivo atual no máximo a cada EMIT_INTERVAL (sempre em 100%).
+
+        Args:
+            percent: Progresso em porcentagem
+            current: Texto do arquivo atual (None mantém o anterior)
+        """
+        now = time.monotonic()
+        if percent < 100 and now - self._last_progress_time < self.EMIT_INTERVAL:
+            return
+        self._last_progress_time = now
+        if percent != self._last_progress:
+            self._last_progress = percent
+            self.progress.emit(percent)
+        if current is not None:
+            self.current_file.emit(current)
+
+    def _set_quiet_variables(self, acad):
+        """
+        Desliga diálogos e eco de comandos do AutoCAD durante a conversão.
+
+        Args:
+            acad: Objeto AutoCAD.Application
+
+        Returns:
+            Dicionário {variável: valor anterior} para restaurar ao final
+        """
+        previous = {}
+        try:
+            doc = acad.ActiveDocument
+        except Exception:
+            # Nenhum documento aberto: nada a ajustar
+            return previous
+
+        for name, value in self.QUIET_VARIABLES.items():
+            try:
+                previous[name] = doc.GetVariable(name)
+                doc.SetVariable(name, value)
+            except Exception:
+                pass
+        return previous
+
+    def _restore_variables(self, acad, previous):
+        """
+        Restaura as variáveis alteradas por _set_quiet_variables.
+
+        Args:
+            acad: Objeto AutoCAD.Application
+            previous: Dicionário {variável: valor anterior}
+        """
+        if not previous:
+            return
+        try:
+            doc = acad.ActiveDocument
+            for name, value in previous.items():
+                doc.SetVariable(name, value)
+        except Exception:
+            pass
+
+    def _scan_source_folder(self):
+        """
+        Varre a pasta de origem uma única vez com os.scandir.
+
+        Returns:
+            Tuple (dwg_files, dxf_mtimes, all_files):
+            dwg_files - lista ordenada de (caminho, mtime) dos .dwg (qualquer caixa);
+            dxf_mtimes - {nome base em minúsculas: mtime} dos .dxf existentes;
+            all_files - nomes de todas as entradas da pasta
+        """
+        dwg_files = []
+        dxf_mtimes = {}
+        all_files = []
+        with os.scandir(self.source_folder) as entries:
+            for entry in entries:
+                all_files.append(entry.name)
+                name_lower = entry.name.lower()
+                if not name_lower.endswith((".dwg", ".dxf")) or not entry.is_file():
+                    continue
+                mtime = entry.stat().st_mtime
+                if name_lower.endswith(".dwg"):
+                    dwg_files.append((entry.path, mtime))
+                else:
+                    dxf_mtimes[name_lower[:-4]] = mtime
+        dwg_files.sort()
+        return dwg_files, dxf_mtimes, all_files
 
     def run(self):
         """Executa a conversao dos arquivos DWG para DXF."""
+        acad = None
+        previous_vars = {}
         try:
             import pythoncom
             import win32com.client
-            import time
 
             stats = {
                 'total': 0,
@@ -112,55 +542,52 @@ class DXFConversionWorker(QThread):
 
             # Inicializa COM
             pythoncom.CoInitialize()
-            self.log.emit("Conectando ao AutoCAD...")
+            self._log("Conectando ao AutoCAD...")
 
             # Conecta ao AutoCAD
             try:
                 acad = win32com.client.Dispatch("AutoCAD.Application")
                 acad.Visible = False
-                self.log.emit("Conexao com AutoCAD estabelecida.")
+                previous_vars = self._set_quiet_variables(acad)
+                self._log("Conexao com AutoCAD estabelecida.")
             except Exception as e:
+                self._flush_log()
                 self.error.emit(f"Erro ao conectar com AutoCAD: {str(e)}")
                 self.finished.emit(stats)
                 return
 
-            # Busca arquivos DWG (case-insensitive para pegar .dwg e .DWG)
-            import glob
-            dwg_pattern = os.path.join(self.source_folder, "*.dwg")
-            dwg_files = glob.glob(dwg_pattern)
-
-            # Tenta também com maiúscula se não encontrar
-            if not dwg_files:
-                dwg_pattern_upper = os.path.join(self.source_folder, "*.DWG")
-                dwg_files = glob.glob(dwg_pattern_upper)
+            # Busca arquivos DWG (case-insensitive) e DXF existentes numa única varredura
+            dwg_files, dxf_mtimes, all_files = self._scan_source_folder()
 
             # Debug: mostra o que está procurando
-            self.log.emit(f"Pasta pesquisada: {self.source_folder}")
-            self.log.emit(f"Padrao de busca: {dwg_pattern}")
+            self._log(f"Pasta pesquisada: {self.source_folder}")
 
             if not dwg_files:
-                self.log.emit("Nenhum arquivo .dwg encontrado na pasta.")
-                # Lista todos os arquivos da pasta para debug
-                try:
-                    all_files = os.listdir(self.source_folder)
-                    self.log.emit(f"Arquivos na pasta: {len(all_files)} itens")
-                    # Mostra primeiros 10 arquivos
-                    for f in all_files[:10]:
-                        self.log.emit(f"  - {f}")
-                    if len(all_files) > 10:
-                        self.log.emit(f"  ... e mais {len(all_files) - 10} arquivos")
-                except Exception as e:
-                    self.log.emit(f"Erro ao listar pasta: {e}")
+                self._log("Nenhum arquivo .dwg encontrado na pasta.")
+                # Lista os arquivos da pasta para debug (já lidos na varredura)
+                self._log(f"Arquivos na pasta: {len(all_files)} itens")
+                # Mostra primeiros 10 arquivos
+                for f in all_files[:10]:
+                    self._log(f"  - {f}")
+                if len(all_files) > 10:
+                    self._log(f"  ... e mais {len(all_files) - 10} arquivos")
+                self._flush_log()
                 self.finished.emit(stats)
                 return
 
             stats['total'] = len(dwg_files)
-            self.log.emit(f"Encontrados: {len(dwg_files)} arquivos .dwg")
+            self._log(f"Encontrados: {len(dwg_files)} arquivos .dwg")
+
+            # Tipo AcSaveAsType do DXF de saída (padrão R2013)
+            save_as_type = self.DXF_SAVE_AS_TYPES.get(
+                self.dxf_version, self.DXF_SAVE_AS_TYPES["R2013"]
+            )
 
-            # Processa cada arquivo
-            for i, dwg_path in enumerate(dwg_files):
-                if self._is_cancelled:
-                    self.log.emit("Conversao cancelada pelo usuario.")
+            # Processa cada arquivo (progresso limitado a EMIT_INTERVAL)
+            for i, (dwg_path, dwg_mtime) in enumerate(dwg_files):
+                if self._cancel.is_set():
+                    self._log("Conversao cancelada pelo usuario.")
+                    self._flush_log()
                     self.cancelled.emit()
                     return
 
@@ -168,17 +595,20 @@ class DXFConversionWorker(QThread):
                 dxf_path = os.path.splitext(dwg_path)[0] + ".dxf"
 
                 # Verifica se DXF ja existe e eh mais recente
-                if os.path.exists(dxf_path):
-                    dwg_mtime = os.path.getmtime(dwg_path)
-                    dxf_mtime = os.path.getmtime(dxf_path)
+                dxf_mtime = dxf_mtimes.get(os.path.splitext(dwg_filename)[0].lower())
+                if dxf_mtime is not None:
                     if dxf_mtime > dwg_mtime:
-                        self.log.emit(f"[{i+1}/{len(dwg_files)}] Pulado: {dwg_filename} -> DXF ja atual")
+                        self._log(f"[{i+1}/{len(dwg_files)}] Pulado: {dwg_filename} -> DXF ja atual")
                         stats['skipped'] += 1
-                        self.progress.emit(int((i + 1) / len(dwg_files) * 100))
+                        self._report_progress((i + 1) * 100 // len(dwg_files))
                         continue
 
-                self.current_file.emit(f"[{i+1}/{len(dwg_files)}] {dwg_filename}")
-                self.progress.emit(int((i + 1) / len(dwg_files) * 100))
+                self._report_progress(
+                    (i + 1) * 100 // len(dwg_files),
+                    f"[{i+1}/{len(dwg_files)}] {dwg_filename}"
+                )
+                # Envia o log pendente antes da etapa lenta no AutoCAD
+                self._flush_log()
 
                 # Sistema de retry: ate 3 tentativas
                 max_retries = 3
@@ -186,7 +616,8 @@ class DXFConversionWorker(QThread):
                 last_error = None
 
                 for retry in range(max_retries):
-                    if self._is_cancelled:
+                    if self._cancel.is_set():
+                        self._flush_log()
                         self.cancelled.emit()
                         return
 
@@ -195,49 +626,22 @@ class DXFConversionWorker(QThread):
                         dwg_path_acad = os.path.abspath(dwg_path).replace("/", "\\")
                         dxf_path_acad = os.path.abspath(dxf_path).replace("/", "\\")
 
-                        # Salva tamanho atual do arquivo DXF (se existir)
-                        old_size = 0
-                        if os.path.exists(dxf_path):
-                            old_size = os.path.getsize(dxf_path)
-
-                        # Abre o DWG
-                        doc = acad.Documents.Open(dwg_path_acad)
-                        time.sleep(0.8)
+                        # Abre o DWG somente leitura
+                        doc = acad.Documents.Open(dwg_path_acad, True)
 
-                        # Exporta para DXF usando DXFOUT via SendCommand
-                        # Codigo da versao DXF: 12 = R2007, 14 = R2010, 16 = R2013, 18 = R2018
-                        version_code = "16"  # R2013
-
-                        # Envia comando DXFOUT
-                        cmd = f'(command "DXFOUT" "{dxf_path_acad}" "" "{version_code}") '
-                        doc.SendCommand(cmd)
-
-                        # Aguarda o arquivo DXF ser criado/atualizado
-                        max_wait = 10  # segundos maximos de espera
-                        wait_count = 0
-                        file_created = False
-
-                        while wait_count < max_wait:
-                            time.sleep(0.5)
-                            wait_count += 0.5
-
-                            if os.path.exists(dxf_path):
-                                new_size = os.path.getsize(dxf_path)
-                                # Verifica se o arquivo cresceu (ou seja, foi reescrito)
-                                if new_size > old_size or new_size > 1000:  # DXF valido tem pelo menos 1KB
-                                    file_created = True
-                                    break
-
-                        # Fecha sem salvar
-                        doc.Close(False)
-                        time.sleep(0.5)  # Delay maior entre tentativas
+                        # Exporta para DXF com SaveAs (síncrono: retorna com o arquivo gravado)
+                        try:
+                            doc.SaveAs(dxf_path_acad, save_as_type)
+                        finally:
+                            # Fecha sem salvar
+                            doc.Close(False)
 
                         # Verifica se o arquivo DXF foi realmente criado
                         if os.path.exists(dxf_path) and os.path.getsize(dxf_path) > 1000:
                             if retry > 0:
-                                self.log.emit(f"[{i+1}/{len(dwg_files)}] Sucesso (tentativa {retry + 1}): {dwg_filename} -> DXF")
+                                self._log(f"[{i+1}/{len(dwg_files)}] Sucesso (tentativa {retry + 1}): {dwg_filename} -> DXF")
                             else:
-                                self.log.emit(f"[{i+1}/{len(dwg_files)}] Sucesso: {dwg_filename} -> DXF")
+                                self._log(f"[{i+1}/{len(dwg_files)}] Sucesso: {dwg_filename} -> DXF")
                             stats['success'] += 1
                             success = True
                             break
@@ -253,23 +657,29 @@ class DXFConversionWorker(QThread):
                         except:
                             pass
 
-                        # Se nao for a ultima tentativa, aguarda antes de tentar novamente
+                        # Se nao for a ultima tentativa, aguarda o AutoCAD ficar ocioso
                         if retry < max_retries - 1:
-                            time.sleep(1.0)  # Espera 1 segundo antes de tentar de novo
+                            self._wait_quiescent(acad)
 
                 # Se apos todas as tentativas ainda falhou
                 if not success:
                     stats['errors'] += 1
                     stats['error_details'].append(f"{dwg_filename}: {last_error}")
-                    self.log.emit(f"[{i+1}/{len(dwg_files)}] Erro (apos {max_retries} tentativas): {dwg_filename}: {last_error}")
+                    self._log(f"[{i+1}/{len(dwg_files)}] Erro (apos {max_retries} tentativas): {dwg_filename}: {last_error}")
 
-            self.log.emit("\n===== CONVERSAO CONCLUIDA =====")
+            self._log("\n===== CONVERSAO CONCLUIDA =====")
+            self._flush_log()
             self.finished.emit(stats)
 
         except Exception as e:
+            self._flush_log()
             self.error.emit(f"Erro geral: {str(e)}")
             self.finished.emit(stats)
 
+        finally:
+            if acad is not None:
+                self._restore_variables(acad, previous_vars)
+
 
 class DXFWorker(QThread):
     """Worker thread para processamento DXF com ezdxf."""
@@ -281,103 +691,258 @@ class DXFWorker(QThread):
     current_file = Signal(str)
     cancelled = Signal()
 
+    # Sinais para a GUI: linhas de log por lote e intervalo mínimo (s) entre atualizações
+    LOG_BATCH_LINES = 50
+    EMIT_INTERVAL = 0.1
+
+    # Colunas convertidas em texto por registro e o valor usado quando vazias
+    TEXT_COLUMNS = ['POSICAO', 'Elevacao',
+                    'MEDIDA_H', 'MEDIDA_L', 'MEDIDA_M',
+                    'MEDIDA_H1', 'MEDIDA_H2', 'MEDIDA_L1', 'MEDIDA_L2', 'MEDIDA_B',
+                    'NUM_DOC', 'QTD', 'CLIENTE']
+    TEXT_FILL = ['nan', 'nan'] + ['-'] * 8 + [''] * 3
+
     def __init__(self, excel_path, template_folder, generate_pdf=False):
         super().__init__()
         self.excel_path = excel_path
         self.template_folder = template_folder
         self.generate_pdf = generate_pdf
-        self._is_cancelled = False
+        # Sinalizado pela thread da GUI; lido pelo laço do worker sem trava
+        self._cancel = threading.Event()
+        self._pdf_dir = None
+        self._output_cache = {}
+        self._output_cache_path = None
+        self._log_buffer = []
+        self._last_log_flush = 0.0
+        self._last_progress = -1
+        self._last_progress_time = 0.0
 
     def cancel_processing(self):
         """Cancela o processamento atual."""
-        self._is_cancelled = True
+        self._cancel.set()
 
-    def process_document(self, template_path, output_path, attribute_mapping):
+    def _log(self, message):
         """
-        Processa um documento DXF - lê template, modifica atributos, salva.
+        Acumula uma linha de log; envia à GUI em lotes (LOG_BATCH_LINES ou EMIT_INTERVAL).
 
         Args:
-            template_path: Caminho do template DXF
-            output_path: Caminho de saída do DXF modificado
-            attribute_mapping: Dicionário {tag: valor} para preencher atributos
+            message: Linha de log
+        """
+        self._log_buffer.append(message)
+        if (len(self._log_buffer) >= self.LOG_BATCH_LINES
+                or time.monotonic() - self._last_log_flush >= self.EMIT_INTERVAL):
+            self._flush_log()
+
+    def _flush_log(self):
+        """Envia as linhas de log acumuladas num único sinal."""
+        if self._log_buffer:
+            self.log.emit("\n".join(self._log_buffer))
+            self._log_buffer = []
+        self._last_log_flush = time.monotonic()
+
+    def _report_progress(self, percent, current=None):
+        """
+        Emite progresso/arquivo atual no máximo a cada EMIT_INTERVAL (sempre em 100%).
+
+        Args:
+            percent: Progresso em porcentagem
+            current: Texto do arquivo atual (None mantém o anterior)
+        """
+        now = time.monotonic()
+        if percent < 100 and now - self._last_progress_time < self.EMIT_INTERVAL:
+            return
+        self._last_progress_time = now
+        if percent != self._last_progress:
+            self._last_progress = percent
+            self.progress.emit(percent)
+        if current is not None:
+            self.current_file.emit(current)
+
+    @staticmethod
+    def _split_groups(df):
+        """
+        Separa o DataFrame por TipoSuporte com uma ordenação estável e um corte linear.
+
+        Args:
+            df: DataFrame com a coluna TipoSuporte (texto)
+
+        Returns:
+            Lista de (tipo_suporte, group_df) em ordem de tipo, linhas na ordem do Excel
+        """
+        df = df.sort_values('TipoSuporte', kind='stable')
+        keys = df['TipoSuporte'].to_numpy()
+        if len(keys) == 0:
+            return []
+        starts = np.flatnonzero(keys[1:] != keys[:-1]) + 1
+        bounds = [0, *starts.tolist(), len(keys)]
+        return [(keys[start], df.iloc[start:end])
+                for start, end in zip(bounds[:-1], bounds[1:])]
+
+    def _list_templates(self):
+        """
+        Lista a pasta de templates uma única vez (uma varredura em vez de um stat por grupo).
 
         Returns:
-            Tuple (success, attr_count, error_message)
+            Dicionário {nome .dxf normalizado por os.path.normcase: (caminho, mtime)}
         """
         try:
-            # Lê o template DXF
-            doc = ezdxf.readfile(template_path)
+            with os.scandir(self.template_folder) as entries:
+                return {
+                    os.path.normcase(entry.name): (entry.path, entry.stat().st_mtime)
+                    for entry in entries
+                    if entry.is_file() and entry.name.lower().endswith('.dxf')
+                }
+        except OSError:
+            return {}
+
+    def _row_texts(self, group_df):
+        """
+        Extrai as colunas usadas no mapeamento (já lidas como texto), de uma vez para o grupo.
 
-            attr_count = 0
-            found_attributes = False
+        Medidas vazias viram "-" e NUM_DOC/QTD/CLIENTE vazios viram "".
 
-            # Processa todos os layouts (itera diretamente sobre Layout objects)
-            for layout in doc.layouts:
-                layout_name = layout.name
-                if layout_name == "Model":
-                    continue
+        Args:
+            group_df: DataFrame do grupo (um TipoSuporte)
 
-                # Busca entidades INSERT (block references) com atributos
-                for entity in layout:
-                    if entity.dxftype() == 'INSERT':
-                        try:
-                            for attrib in entity.attribs:
-                                found_attributes = True
-                                # Converte tag para string antes de upper()
-                                tag_value = attrib.dxf.tag
-                                if tag_value is not None:
-                                    tag = str(tag_value).upper()
-                                    if tag in attribute_mapping:
-                                        attrib.dxf.text = attribute_mapping[tag]
-                                        attr_count += 1
-                        except Exception:
-                            # Ignora erros em atributos individuais
-                            pass
+        Returns:
+            Lista de tuplas (posicao, elevacao, h, l, m, h1, h2, l1, l2, b,
+            num_doc, qtd, cliente)
+        """
+        values = group_df[self.TEXT_COLUMNS].to_numpy(dtype=object)
+        texts = np.where(values == "", self.TEXT_FILL, values)
+        return [tuple(row) for row in texts.tolist()]
 
-            # Verifica se encontrou e modificou atributos
-            if not found_attributes or attr_count == 0:
-                return False, 0, "Sem atributos encontrados"
+    def _read_excel(self):
+        """
+        Lê apenas as colunas usadas, como texto, com o leitor calamine (Rust) quando disponível.
 
-            # Salva o documento modificado
-            doc.saveas(output_path)
-            return True, attr_count, None
+        Células vazias ficam como "" (sem conversão para NaN/float).
 
-        except Exception as e:
-            return False, 0, str(e)
+        Returns:
+            DataFrame com as colunas do processamento
+        """
+        options = dict(usecols=lambda col: col in ProcessingConfig.EXCEL_COLUMNS,
+                       dtype=str, na_filter=False)
+        try:
+            return pd.read_excel(self.excel_path, engine="calamine", **options)
+        except (ImportError, ValueError):
+            # python-calamine ausente ou pandas < 2.2: mantém o openpyxl
+            return pd.read_excel(self.excel_path, **options)
 
-    def convert_to_pdf(self, dxf_path, pdf_path):
+    def _load_output_cache(self, output_dir):
         """
-        Converte arquivo DXF para PDF usando matplotlib.
+        Carrega o cache de saídas da execução anterior (se existir).
 
-        Returns: (success, error_message)
+        Args:
+            output_dir: Pasta de saída (a do Excel)
         """
+        self._output_cache_path = os.path.join(output_dir, ProcessingConfig.OUTPUT_CACHE_FILE)
+        try:
+            with open(self._output_cache_path, encoding='utf-8') as f:
+                self._output_cache = json.load(f)
+        except (OSError, ValueError):
+            self._output_cache = {}
+
+    def _save_output_cache(self):
+        """Grava o cache de saídas (erros de escrita são ignorados)."""
+        if self._output_cache_path is None:
+            return
         try:
-            doc = ezdxf.readfile(dxf_path)
-            ctx = RenderContext(doc)
+            with open(self._output_cache_path, 'w', encoding='utf-8') as f:
+                json.dump(self._output_cache, f)
+        except OSError:
+            pass
 
-            # Cria figura matplotlib
-            fig, ax = plt.subplots(figsize=(8.27, 11.69))  # A4 size
+    @staticmethod
+    def _output_cache_key(template_mtime, attribute_mapping):
+        """
+        Chave estável (entre execuções) para template + valores dos atributos.
 
-            # Renderiza apenas PaperSpace layouts
-            layout_found = False
-            for layout in doc.layouts:
-                if layout.name == "Model":
-                    continue
-                Frontend(ctx, MatplotlibBackend(ax)).draw_layout(layout)
-                layout_found = True
-                break  # Primeiro PaperSpace apenas
+        Args:
+            template_mtime: mtime do template DXF
+            attribute_mapping: Dicionário {tag: valor}
 
-            if not layout_found:
-                plt.close(fig)
-                return False, "Nenhum layout PaperSpace encontrado"
+        Returns:
+            Hash hexadecimal
+        """
+        data = repr((template_mtime, sorted(attribute_mapping.items())))
+        return hashlib.sha1(data.encode('utf-8')).hexdigest()
 
-            # Salva como PDF
-            fig.savefig(pdf_path, format='pdf', bbox_inches='tight', dpi=300)
-            plt.close(fig)
-            return True, None
+    def _cached_output(self, output_path, cache_key):
+        """
+        Verifica se output_path já foi gerado com a mesma chave e não foi alterado.
 
-        except Exception as e:
-            return False, str(e)
+        Returns:
+            Número de atributos preenchidos, ou None se precisa gerar
+        """
+        entry = self._output_cache.get(output_path)
+        if entry is None or entry.get('key') != cache_key:
+            return None
+        try:
+            if os.path.getmtime(output_path) != entry.get('mtime'):
+                return None
+        except OSError:
+            return None
+        return entry.get('attr_count')
+
+    def _handle_result(self, stats, tipo_suporte, job, result, i, total_rows, unchanged=False):
+        """
+        Registra o resultado de um documento (log, estatísticas e PDF opcional).
+
+        Args:
+            stats: ProcessingStats da execução
+            tipo_suporte: Tipo (template) do documento
+            job: Tupla (posicao, filename_suffix, output_path, attribute_mapping,
+                cache_key, pdf_path)
+            result: Tupla (success, attr_count, error_msg, pdf_result) de process_documents
+            i: Número do documento (1-based) no total
+            total_rows: Total de registros
+            unchanged: True se o DXF foi reaproveitado do cache de saídas
+        """
+        posicao, _, output_path, _, cache_key, pdf_path = job
+        success, attr_count, error_msg, pdf_result = result
+        output_filename = os.path.basename(output_path)
+
+        if success:
+            if unchanged:
+                self._log(f"[{i}/{total_rows}] ⏭️ {output_filename} inalterado ({attr_count} atribs)")
+            else:
+                self._log(f"[{i}/{total_rows}] ✅ {output_filename} ({attr_count} atribs)")
+                try:
+                    self._output_cache[output_path] = {
+                        'key': cache_key,
+                        'mtime': os.path.getmtime(output_path),
+                        'attr_count': attr_count,
+                    }
+                except OSError:
+                    pass
+            stats.success += 1
+
+            # PDF (gerado junto com o DXF no pool; inalterado quando reaproveitado)
+            if unchanged and pdf_path is not None:
+                stats.pdf_generated += 1
+            elif pdf_result is not None:
+                pdf_success, pdf_error = pdf_result
+                if pdf_success:
+                    self._log(f"      📄 {os.path.basename(pdf_path)} criado")
+                    stats.pdf_generated += 1
+                else:
+                    self._log(f"      ⚠️ PDF falhou: {pdf_error}")
+                    stats.pdf_failed += 1
+                    stats.pdf_failed_details.append(
+                        f"{posicao}: {pdf_error}"
+                    )
+        else:
+            if error_msg == "Sem atributos encontrados":
+                self._log(f"  ⚠️ Sem atributos")
+                stats.no_attributes += 1
+                stats.no_attributes_details.append(
+                    f"{posicao} (Tipo: {tipo_suporte})"
+                )
+            else:
+                self._log(f"  ❌ Erro: {error_msg}")
+                stats.errors += 1
+                stats.error_details.append(f"{posicao}: {error_msg}")
 
     def run(self):
         """Executa o processamento dos dados."""
@@ -385,87 +950,81 @@ class DXFWorker(QThread):
             stats = ProcessingStats()
 
             # Lê o arquivo Excel
-            self.log.emit("Lendo arquivo Excel...")
-            df = pd.read_excel(self.excel_path)
+            self._log("Lendo arquivo Excel...")
+            df = self._read_excel()
 
             # Renomeia coluna 'Name' para 'TipoSuporte' se existir
             if 'Name' in df.columns:
                 df = df.rename(columns={'Name': 'TipoSuporte'})
-                self.log.emit("Coluna 'Name' renomeada para 'TipoSuporte'")
+                self._log("Coluna 'Name' renomeada para 'TipoSuporte'")
 
             # Verifica se todas as colunas necessárias existem
             missing_columns = [col for col in ProcessingConfig.REQUIRED_COLUMNS
                              if col not in df.columns]
 
             if missing_columns:
+                self._flush_log()
                 self.error.emit(f"Colunas faltando: {', '.join(missing_columns)}")
                 stats.errors = 1
                 stats.error_details.append(f"Colunas faltando: {', '.join(missing_columns)}")
                 self.finished.emit(stats.to_dict())
                 return
 
-            # Agrupa por TipoSuporte para processamento eficiente
-            grouped = df.groupby('TipoSuporte')
+            # Agrupa por TipoSuporte para processamento eficiente (tipo vazio fica de fora)
+            grouped = self._split_groups(df[df['TipoSuporte'] != ""])
+            templates = self._list_templates()
             total_rows = len(df)
             stats.total = total_rows
             processed_count = 0
+            # Progresso consultado a cada ~1% dos registros
+            emit_every = max(1, total_rows // 100)
 
-            self.log.emit(f"Processando {total_rows} registros em {len(grouped)} grupo(s).")
+            self._log(f"Processando {total_rows} registros em {len(grouped)} grupo(s).")
 
             # Rastreia posições já processadas para detectar duplicatas
             position_counter = {}
-
+            output_dir = os.path.dirname(self.excel_path)
+            self._load_output_cache(output_dir)
+            self._pdf_dir = os.path.join(output_dir, "Pdf")
+            if self.generate_pdf:
+                os.makedirs(self._pdf_dir, exist_ok=True)
+            data_atual = datetime.now().strftime('%d/%m/%Y')
+
+            # Leitura/escrita dos DXF e PDF (CPU) em paralelo num pool de processos;
+            # sufixos de duplicata e estatísticas ficam nesta thread.
+            # 1ª etapa: monta as tarefas de todos os tipos (saídas inalteradas já são registradas)
+            pending_groups = []
             for tipo_suporte, group_df in grouped:
-                if self._is_cancelled:
-                    self.log.emit("\n⚠️ Processamento cancelado pelo usuário.")
+                if self._cancel.is_set():
+                    self._log("\n⚠️ Processamento cancelado pelo usuário.")
+                    self._flush_log()
                     self.cancelled.emit()
                     return
 
-                template_path = os.path.join(
-                    self.template_folder,
-                    f"{tipo_suporte}.dxf"
-                )
-
                 # Verifica se o template existe
-                if not os.path.exists(template_path):
-                    self.log.emit(f"⚠️ Template {tipo_suporte}.dxf não encontrado.")
+                template = templates.get(os.path.normcase(f"{tipo_suporte}.dxf"))
+                if template is None:
+                    self._log(f"⚠️ Template {tipo_suporte}.dxf não encontrado.")
                     stats.template_not_found += len(group_df)
-                    for _, row in group_df.iterrows():
-                        posicao = str(row['POSICAO'])
+                    for posicao in map(str, group_df['POSICAO'].tolist()):
                         stats.not_found_details.append(
                             f"{posicao} (Tipo: {tipo_suporte})"
                         )
                     processed_count += len(group_df)
+                    self._report_progress(processed_count * 100 // total_rows)
                     continue
 
-                self.log.emit(f"\n{'='*50}")
-                self.log.emit(f"TEMPLATE: {tipo_suporte}.dxf ({len(group_df)} docs)")
-                self.log.emit(f"{'='*50}")
+                self._log(f"\n{'='*50}")
+                self._log(f"TEMPLATE: {tipo_suporte}.dxf ({len(group_df)} docs)")
+                self._log(f"{'='*50}")
 
-                # Processa cada documento deste tipo
-                for idx, (_, row) in enumerate(group_df.iterrows()):
-                    if self._is_cancelled:
-                        self.cancelled.emit()
-                        return
-
-                    i = processed_count + idx
-
-                    # Extrai dados do Excel
-                    posicao = str(row['POSICAO'])
-                    elevacao = str(row['Elevacao']).replace(',', '.')
-                    h = str(row['MEDIDA_H']) if pd.notna(row['MEDIDA_H']) else "-"
-                    l = str(row['MEDIDA_L']) if pd.notna(row['MEDIDA_L']) else "-"
-                    m = str(row['MEDIDA_M']) if pd.notna(row['MEDIDA_M']) else "-"
-                    h1 = str(row['MEDIDA_H1']) if pd.notna(row['MEDIDA_H1']) else "-"
-                    h2 = str(row['MEDIDA_H2']) if pd.notna(row['MEDIDA_H2']) else "-"
-                    l1 = str(row['MEDIDA_L1']) if pd.notna(row['MEDIDA_L1']) else "-"
-                    l2 = str(row['MEDIDA_L2']) if pd.notna(row['MEDIDA_L2']) else "-"
-                    b = str(row['MEDIDA_B']) if pd.notna(row['MEDIDA_B']) else "-"
-
-                    # Extrai novos campos do Excel (tratando valores NaN)
-                    num_doc = str(row['NUM_DOC']) if pd.notna(row['NUM_DOC']) else ""
-                    qtd = str(row['QTD']) if pd.notna(row['QTD']) else ""
-                    cliente = str(row['CLIENTE']) if pd.notna(row['CLIENTE']) else ""
+                # Monta as tarefas deste tipo (saídas inalteradas vão para unchanged)
+                template_path, template_mtime = template
+                jobs = []
+                unchanged = []
+                for (posicao, elevacao, h, l, m, h1, h2, l1, l2, b,
+                     num_doc, qtd, cliente) in self._row_texts(group_df):
+                    elevacao = elevacao.replace(',', '.')
 
                     # Tratamento de duplicatas
                     if posicao not in position_counter:
@@ -480,14 +1039,7 @@ class DXFWorker(QThread):
                         )
 
                     output_filename = f"{posicao}{filename_suffix}.dxf"
-                    output_path = os.path.join(
-                        os.path.dirname(self.excel_path),
-                        output_filename
-                    )
-
-                    progress_percent = int((i + 1) / total_rows * 100)
-                    self.progress.emit(progress_percent)
-                    self.current_file.emit(f"[{idx+1}/{len(group_df)}] {posicao}")
+                    output_path = os.path.join(output_dir, output_filename)
 
                     # Mapeamento de atributos
                     attribute_mapping = {
@@ -498,64 +1050,117 @@ class DXFWorker(QThread):
                         "H1": h1, "H2": h2,
                         "L1": l1, "L2": l2,
                         "B": b,
-                        "DATA_ATUAL": datetime.now().strftime('%d/%m/%Y'),
+                        "DATA_ATUAL": data_atual,
                         # Novos atributos
                         "NUM_DOC": num_doc,
                         "QTD": qtd,
                         "CLIENTE": cliente
                     }
+                    pdf_path = None
+                    if self.generate_pdf:
+                        pdf_path = os.path.join(self._pdf_dir, f"{posicao}{filename_suffix}.pdf")
+
+                    cache_key = self._output_cache_key(template_mtime, attribute_mapping)
+                    job = (posicao, filename_suffix, output_path, attribute_mapping,
+                           cache_key, pdf_path)
+                    cached_count = self._cached_output(output_path, cache_key)
+                    if cached_count is not None and (pdf_path is None or os.path.exists(pdf_path)):
+                        unchanged.append((job, cached_count))
+                    else:
+                        jobs.append(job)
+
+                group_done = 0
+                for job, cached_count in unchanged:
+                    group_done += 1
+                    processed_count += 1
+                    if processed_count % emit_every == 0:
+                        self._report_progress(
+                            processed_count * 100 // total_rows,
+                            f"[{group_done}/{len(group_df)}] {job[0]}"
+                        )
+                    self._handle_result(stats, tipo_suporte, job, (True, cached_count, None, None),
+                                        processed_count, total_rows, unchanged=True)
+
+                if jobs:
+                    pending_groups.append((tipo_suporte, template_path, jobs,
+                                           group_done, len(group_df)))
+                self._flush_log()
+
+            # 2ª etapa: envia os lotes de todos os tipos de uma vez e consome na ordem
+            # de conclusão. O lote é limitado para que os documentos se distribuam por
+            # todos os processos mesmo com poucos registros (um template por lote)
+            total_jobs = sum(len(jobs) for _, _, jobs, _, _ in pending_groups)
+            if total_jobs:
+                max_workers = min(ProcessingConfig.MAX_WORKERS or os.cpu_count() or 1, total_jobs)
+                chunk_size = max(1, min(ProcessingConfig.CHUNK_SIZE,
+                                        math.ceil(total_jobs / max_workers)))
+                self._log(f"\nGerando {total_jobs} documento(s) em {max_workers} processo(s)...")
+                self._flush_log()
+
+                executor = ProcessPoolExecutor(max_workers=max_workers)
+                cancelled = False
+                try:
+                    futures = {}
+                    group_done = {}
+                    for tipo_suporte, template_path, jobs, done, group_len in pending_groups:
+                        group_done[tipo_suporte] = done
+                        for start in range(0, len(jobs), chunk_size):
+                            chunk = jobs[start:start + chunk_size]
+                            future = executor.submit(
+                                process_documents, template_path,
+                                [(output_path, mapping, pdf_path)
+                                 for _, _, output_path, mapping, _, pdf_path in chunk]
+                            )
+                            futures[future] = (tipo_suporte, group_len, chunk)
 
-                    # Processa documento (sem delays!)
-                    success, attr_count, error_msg = self.process_document(
-                        template_path, output_path, attribute_mapping
-                    )
-
-                    if success:
-                        self.log.emit(f"[{i+1}/{total_rows}] ✅ {output_filename} ({attr_count} atribs)")
-                        stats.success += 1
-
-                        # Gera PDF se habilitado
-                        if self.generate_pdf:
-                            pdf_folder = os.path.join(os.path.dirname(self.excel_path), "Pdf")
-                            os.makedirs(pdf_folder, exist_ok=True)
-
-                            pdf_filename = f"{posicao}{filename_suffix}.pdf"
-                            pdf_path = os.path.join(pdf_folder, pdf_filename)
+                    for future in as_completed(futures):
+                        if self._cancel.is_set():
+                            cancelled = True
+                            break
 
-                            pdf_success, pdf_error = self.convert_to_pdf(output_path, pdf_path)
-                            if pdf_success:
-                                self.log.emit(f"      📄 {pdf_filename} criado")
-                                stats.pdf_generated += 1
-                            else:
-                                self.log.emit(f"      ⚠️ PDF falhou: {pdf_error}")
-                                stats.pdf_failed += 1
-                                stats.pdf_failed_details.append(
-                                    f"{posicao}: {pdf_error}"
+                        tipo_suporte, group_len, chunk = futures[future]
+                        try:
+                            results = future.result()
+                        except Exception as e:
+                            results = [(False, 0, str(e), None)] * len(chunk)
+
+                        for job, result in zip(chunk, results):
+                            group_done[tipo_suporte] += 1
+                            processed_count += 1
+                            if processed_count % emit_every == 0:
+                                self._report_progress(
+                                    processed_count * 100 // total_rows,
+                                    f"[{group_done[tipo_suporte]}/{group_len}] {job[0]}"
                                 )
-                    else:
-                        if error_msg == "Sem atributos encontrados":
-                            self.log.emit(f"  ⚠️ Sem atributos")
-                            stats.no_attributes += 1
-                            stats.no_attributes_details.append(
-                                f"{posicao} (Tipo: {tipo_suporte})"
-                            )
-                        else:
-                            self.log.emit(f"  ❌ Erro: {error_msg}")
-                            stats.errors += 1
-                            stats.error_details.append(f"{posicao}: {error_msg}")
+                            self._handle_result(stats, tipo_suporte, job, result, processed_count, total_rows)
 
-                processed_count += len(group_df)
+                        self._flush_log()
+                finally:
+                    # No cancelamento não espera os lotes em execução: descarta os pendentes
+                    executor.shutdown(wait=not cancelled, cancel_futures=True)
+
+                if cancelled:
+                    self._log("\n⚠️ Processamento cancelado pelo usuário.")
+                    self._flush_log()
+                    self.cancelled.emit()
+                    return
 
-            self.log.emit("\n===== PROCESSAMENTO CONCLUÍDO =====")
+            self.progress.emit(100)
+            self._log("\n===== PROCESSAMENTO CONCLUÍDO =====")
+            self._flush_log()
             self.finished.emit(stats.to_dict())
 
         except Exception as e:
+            self._flush_log()
             self.error.emit(f"Erro geral: {str(e)}")
             stats = ProcessingStats()
             stats.errors = 1
             stats.error_details.append(f"Erro geral: {str(e)}")
             self.finished.emit(stats.to_dict())
 
+        finally:
+            self._save_output_cache()
+
 
 class MainWindow(QMainWindow):
     """Janela principal da aplicação de processamento DXF."""
@@ -635,8 +1240,13 @@ class MainWindow(QMainWindow):
         # Área de log
         log_layout = QVBoxLayout()
         log_label = QLabel("Log de Processamento:")
-        self.log_text = QTextEdit()
+        self.log_text = QPlainTextEdit()
         self.log_text.setReadOnly(True)
+        # Texto simples com histórico limitado: append O(1) e memória constante
+        self.log_text.setMaximumBlockCount(ProcessingConfig.LOG_MAX_LINES)
+        # Log somente leitura: sem pilha de desfazer nem recentralização a cada linha
+        self.log_text.setUndoRedoEnabled(False)
+        self.log_text.setCenterOnScroll(False)
         # Usar fonte monoespaçada para melhor legibilidade do log
         font = QFont("Consolas" if sys.platform == "win32" else "Monospace")
         font.setPointSize(10)
@@ -667,6 +1277,7 @@ class MainWindow(QMainWindow):
         self.template_folder = None
         self.worker = None
         self.conversion_worker = None
+        self._scroll_pending = False
 
     def select_excel_file(self):
         """Abre diálogo para selecionar arquivo Excel."""
@@ -732,11 +1343,12 @@ class MainWindow(QMainWindow):
         self.convert_button.setEnabled(False)
 
         # Adiciona cabecalho ao log
-        from datetime import datetime as dt
-        self.add_to_log(f"=== CONVERSAO DWG -> DXF ===")
-        self.add_to_log(f"Data/Hora: {dt.now().strftime('%d/%m/%Y %H:%M:%S')}")
-        self.add_to_log(f"Pasta: {folder}")
-        self.add_to_log("-" * 50)
+        self.add_to_log(
+            f"=== CONVERSAO DWG -> DXF ===\n"
+            f"Data/Hora: {datetime.now().strftime(_TS_FMT)}\n"
+            f"Pasta: {folder}\n"
+            f"{'-' * 50}"
+        )
 
         # Cria e inicia o worker de conversao
         self.conversion_worker = DXFConversionWorker(folder, dxf_version="R2013")
@@ -750,9 +1362,7 @@ class MainWindow(QMainWindow):
 
     def conversion_cancelled(self):
         """Chamado quando a conversao e cancelada."""
-        self.add_to_log("\n" + "=" * 50)
-        self.add_to_log("CONVERSAO CANCELADA PELO USUARIO")
-        self.add_to_log("=" * 50)
+        self.add_to_log("\n".join(["\n" + "=" * 50, "CONVERSAO CANCELADA PELO USUARIO", "=" * 50]))
         self.excel_button.setEnabled(True)
         self.template_button.setEnabled(True)
         self.process_button.setEnabled(True)
@@ -761,22 +1371,24 @@ class MainWindow(QMainWindow):
 
     def conversion_finished(self, stats):
         """Chamado ao final da conversao."""
-        self.add_to_log("\n" + "=" * 50)
-        self.add_to_log("RELATORIO FINAL DE CONVERSAO")
-        self.add_to_log("-" * 50)
-        self.add_to_log(f"Total de arquivos: {stats['total']}")
-        self.add_to_log(f"Convertidos com sucesso: {stats['success']}")
-        self.add_to_log(f"Ja atualizados (pulados): {stats.get('skipped', 0)}")
-        self.add_to_log(f"Erros: {stats['errors']}")
+        # Monta o relatorio inteiro e anexa ao log de uma vez (um unico relayout)
+        lines = [
+            f"\n{'=' * 50}\n"
+            f"RELATORIO FINAL DE CONVERSAO\n"
+            f"{'-' * 50}\n"
+            f"Total de arquivos: {stats['total']}\n"
+            f"Convertidos com sucesso: {stats['success']}\n"
+            f"Ja atualizados (pulados): {stats.get('skipped', 0)}\n"
+            f"Erros: {stats['errors']}"
+        ]
 
         if stats['error_details']:
-            self.add_to_log("\nDetalhes de Erros:")
-            for detail in stats['error_details']:
-                self.add_to_log(f"  - {detail}")
+            lines.append("\nDetalhes de Erros:")
+            lines.extend(f"  - {detail}" for detail in stats['error_details'])
 
-        self.add_to_log("\n" + "=" * 50)
-        from datetime import datetime as dt
-        self.add_to_log(f"Conversao finalizada em: {dt.now().strftime('%d/%m/%Y %H:%M:%S')}")
+        lines.append("\n" + "=" * 50)
+        lines.append(f"Conversao finalizada em: {datetime.now().strftime(_TS_FMT)}")
+        self._append_report("\n".join(lines))
 
         # Reativa os botoes
         self.excel_button.setEnabled(True)
@@ -806,12 +1418,13 @@ class MainWindow(QMainWindow):
         self.process_button.setEnabled(False)
 
         # Adiciona cabeçalho ao log
-        from datetime import datetime as dt
-        self.add_to_log(f"=== INÍCIO DO PROCESSAMENTO ===")
-        self.add_to_log(f"Data/Hora: {dt.now().strftime('%d/%m/%Y %H:%M:%S')}")
-        self.add_to_log(f"Arquivo Excel: {self.excel_path}")
-        self.add_to_log(f"Pasta de Templates: {self.template_folder}")
-        self.add_to_log("-" * 50)
+        self.add_to_log(
+            f"=== INÍCIO DO PROCESSAMENTO ===\n"
+            f"Data/Hora: {datetime.now().strftime(_TS_FMT)}\n"
+            f"Arquivo Excel: {self.excel_path}\n"
+            f"Pasta de Templates: {self.template_folder}\n"
+            f"{'-' * 50}"
+        )
 
         # Cria e inicia o worker thread
         self.worker = DXFWorker(
@@ -855,9 +1468,7 @@ class MainWindow(QMainWindow):
 
     def processing_cancelled(self):
         """Chamado quando o processamento é cancelado."""
-        self.add_to_log("\n" + "=" * 50)
-        self.add_to_log("PROCESSAMENTO CANCELADO PELO USUÁRIO")
-        self.add_to_log("=" * 50)
+        self.add_to_log("\n".join(["\n" + "=" * 50, "PROCESSAMENTO CANCELADO PELO USUÁRIO", "=" * 50]))
         self.cancel_button.setEnabled(False)
         self.excel_button.setEnabled(True)
         self.template_button.setEnabled(True)
@@ -873,9 +1484,32 @@ class MainWindow(QMainWindow):
         self.progress_label.setText(file_info)
 
     def add_to_log(self, message):
-        """Adiciona mensagem ao log."""
-        self.log_text.append(message)
-        # Rola para o fim do texto
+        """Adiciona mensagem ao log, rolando para o fim só se o usuário já estava no fim."""
+        scrollbar = self.log_text.verticalScrollBar()
+        at_bottom = scrollbar.value() == scrollbar.maximum()
+        self.log_text.appendPlainText(message)
+        # Várias mensagens seguidas geram uma única rolagem no próximo ciclo de eventos
+        if at_bottom and not self._scroll_pending:
+            self._scroll_pending = True
+            QTimer.singleShot(0, self._scroll_log_to_end)
+
+    def _append_report(self, text):
+        """
+        Anexa um relatório grande ao log com a pintura suspensa, repintando uma vez ao final.
+
+        Args:
+            text: Texto do relatório (várias linhas)
+        """
+        self.log_text.setUpdatesEnabled(False)
+        try:
+            self.add_to_log(text)
+        finally:
+            self.log_text.setUpdatesEnabled(True)
+            self.log_text.viewport().update()
+
+    def _scroll_log_to_end(self):
+        """Rola o log até a última linha (agendado por add_to_log)."""
+        self._scroll_pending = False
         scrollbar = self.log_text.verticalScrollBar()
         scrollbar.setValue(scrollbar.maximum())
 
@@ -886,55 +1520,47 @@ class MainWindow(QMainWindow):
 
     def processing_finished(self, stats):
         """Chamado ao final do processamento."""
-        # Gera relatório final
-        self.add_to_log("\n" + "=" * 50)
-        self.add_to_log("RELATÓRIO FINAL DE PROCESSAMENTO")
-        self.add_to_log("-" * 50)
-        self.add_to_log(f"Total de registros processados: {stats['total']}")
-        self.add_to_log(f"Arquivos criados com sucesso: {stats['success']}")
-        self.add_to_log(f"Templates não encontrados: {stats['template_not_found']}")
-        self.add_to_log(f"Templates sem atributos: {stats.get('no_attributes', 0)}")
-        self.add_to_log(f"Posicoes duplicatas tratadas: {stats.get('duplicates', 0)}")
-        self.add_to_log(f"Erros durante o processamento: {stats['errors']}")
+        # Gera relatório final numa lista e anexa ao log de uma vez (um único relayout)
+        lines = [
+            f"\n{'=' * 50}\n"
+            f"RELATÓRIO FINAL DE PROCESSAMENTO\n"
+            f"{'-' * 50}\n"
+            f"Total de registros processados: {stats['total']}\n"
+            f"Arquivos criados com sucesso: {stats['success']}\n"
+            f"Templates não encontrados: {stats['template_not_found']}\n"
+            f"Templates sem atributos: {stats.get('no_attributes', 0)}\n"
+            f"Posicoes duplicatas tratadas: {stats.get('duplicates', 0)}\n"
+            f"Erros durante o processamento: {stats['errors']}"
+        ]
 
         # Estatísticas de PDF
         if stats.get('pdf_generated', 0) > 0 or stats.get('pdf_failed', 0) > 0:
-            self.add_to_log(f"PDFs gerados com sucesso: {stats.get('pdf_generated', 0)}")
-            self.add_to_log(f"PDFs falhados: {stats.get('pdf_failed', 0)}")
-
-        # Detalhes sobre templates não encontrados
-        if stats["template_not_found"] > 0:
-            self.add_to_log("\nDetalhes de Templates Não Encontrados:")
-            for detail in stats["not_found_details"]:
-                self.add_to_log(f"  - {detail}")
-
-        # Detalhes sobre templates sem atributos
-        if stats.get("no_attributes", 0) > 0:
-            self.add_to_log("\nDetalhes de Templates Sem Atributos:")
-            for detail in stats["no_attributes_details"]:
-                self.add_to_log(f"  - {detail}")
-
-        # Detalhes sobre posicoes duplicatas
-        if stats.get("duplicates", 0) > 0:
-            self.add_to_log("\nDetalhes de Posicoes Duplicatas:")
-            for detail in stats["duplicate_details"]:
-                self.add_to_log(f"  - {detail}")
-
-        # Detalhes sobre erros
-        if stats["errors"] > 0:
-            self.add_to_log("\nDetalhes de Erros:")
-            for detail in stats["error_details"]:
-                self.add_to_log(f"  - {detail}")
-
-        # Detalhes sobre PDFs falhados
-        if stats.get("pdf_failed", 0) > 0:
-            self.add_to_log("\nDetalhes de PDFs Falhados:")
-            for detail in stats.get("pdf_failed_details", []):
-                self.add_to_log(f"  - {detail}")
-
-        self.add_to_log("\n" + "=" * 50)
-        from datetime import datetime as dt
-        self.add_to_log(f"Processamento finalizado em: {dt.now().strftime('%d/%m/%Y %H:%M:%S')}")
+            lines.append(
+                f"PDFs gerados com sucesso: {stats.get('pdf_generated', 0)}\n"
+                f"PDFs falhados: {stats.get('pdf_failed', 0)}"
+            )
+
+        # Detalhes por categoria: (contador, título, texto já montado pelo worker)
+        sections = [
+            (stats["template_not_found"], "Templates Não Encontrados",
+             stats["not_found_details_text"]),
+            (stats.get("no_attributes", 0), "Templates Sem Atributos",
+             stats["no_attributes_details_text"]),
+            (stats.get("duplicates", 0), "Posicoes Duplicatas",
+             stats["duplicate_details_text"]),
+            (stats["errors"], "Erros", stats["error_details_text"]),
+            (stats.get("pdf_failed", 0), "PDFs Falhados",
+             stats["pdf_failed_details_text"]),
+        ]
+        for count, title, details_text in sections:
+            if count > 0:
+                lines.append(f"\nDetalhes de {title}:")
+                if details_text:
+                    lines.append(details_text)
+
+        lines.append("\n" + "=" * 50)
+        lines.append(f"Processamento finalizado em: {datetime.now().strftime(_TS_FMT)}")
+        self._append_report("\n".join(lines))
 
         # Reativa os botões
         self.excel_button.setEnabled(True)
@@ -967,6 +1593,14 @@ class MainWindow(QMainWindow):
             summary
         )
 
+    def closeEvent(self, event):
+        """Cancela e aguarda os workers em execução antes de fechar a janela."""
+        for worker in (self.worker, self.conversion_worker):
+            if worker and worker.isRunning():
+                worker.cancel_processing()
+                worker.wait()
+        event.accept()
+
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
@@ -287,7 +287,7 @@ class SearchService:
         Returns:
             Lista de valores únicos ordenada
         """
-        suportes = self._repository.listar_todos()
+        suportes = self._repository.visao_todos()
 
         if campo == 'tag':
             return sorted(set(s.tag for s in suportes))
@@ -318,10 +318,11 @@ class SearchService:
 
         # Adiciona propriedades dinâmicas
         propriedades = self._repository.listar_propriedades_disponiveis()
+        amostra = self._repository.visao_todos()[:100]
         for prop in propriedades:
             # Determina tipo baseado em valores
             valores_amostra = []
-            for s in self._repository.listar_todos()[:100]:
+            for s in amostra:
                 if prop in s.propriedades:
                     valores_amostra.append(s.propriedades[prop])
 
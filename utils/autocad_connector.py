@@ -1,5 +1,6 @@
 """Conector COM para AutoCAD."""
 
+import logging
 import time
 import pythoncom
 import win32com.client
@@ -8,6 +9,8 @@ from dataclasses import dataclass
 
 from .com_error_handler import COMErrorHandler, execute_with_retry
 
+logger = logging.getLogger(__name__)
+
 
 @dataclass
 class ConnectionInfo:
@@ -27,13 +30,25 @@ class AutocadCOMConnector:
     no AutoCAD de forma thread-safe.
     """
 
+    # Nome COM das referências de bloco (literal interned pelo compilador)
+    BLOCK_REFERENCE = 'AcDbBlockReference'
+
+    # Erros COM de AutoCAD ocupado: tratados pelo retry, não como entidade inválida
+    _HRESULTS_RECUPERAVEIS = (
+        COMErrorHandler.RPC_E_CALL_REJECTED,
+        COMErrorHandler.RPC_E_SERVERCALL_RETRYLATER,
+    )
+
     def __init__(self):
         """Inicializa o conector."""
         self._acad: Optional[Any] = None
         self._acad_doc: Optional[Any] = None
         self._acad_model: Optional[Any] = None
-        self._is_initialized: bool = False
+        # Estado da conexão mantido por conectar/_cleanup (atributo simples, lido a cada operação)
+        self.is_connected: bool = False
         self._error_handler = COMErrorHandler()
+        # Índice handle -> entidade COM, preenchido por listar_blocos_suporte
+        self._entidades_por_handle: Dict[str, Any] = {}
         # Garante que COM está inicializado na thread atual
         try:
             pythoncom.CoInitialize()
@@ -41,11 +56,6 @@ class AutocadCOMConnector:
             # J pode estar inicializado
             pass
 
-    @property
-    def is_connected(self) -> bool:
-        """Verifica se está conectado ao AutoCAD."""
-        return self._acad is not None and self._acad_doc is not None
-
     @property
     def application(self) -> Optional[Any]:
         """Retorna a aplicação AutoCAD."""
@@ -81,6 +91,7 @@ class AutocadCOMConnector:
                 self._acad = self._try_create_instance()
 
             if self._acad is None:
+                self.is_connected = False
                 return ConnectionInfo(connected=False)
 
             # Aguarda documento ativo
@@ -91,7 +102,7 @@ class AutocadCOMConnector:
             # Obtém referências ao documento e model space
             self._acad_doc = self._acad.ActiveDocument
             self._acad_model = self._acad_doc.ModelSpace
-            self._is_initialized = True
+            self.is_connected = True
 
             return ConnectionInfo(
                 connected=True,
@@ -144,7 +155,8 @@ class AutocadCOMConnector:
         self._acad_model = None
         self._acad_doc = None
         self._acad = None
-        self._is_initialized = False
+        self.is_connected = False
+        self._entidades_por_handle.clear()
 
     def _ensure_valid_connection(self) -> bool:
         """
@@ -173,13 +185,41 @@ class AutocadCOMConnector:
                 if self._acad and self._acad.Documents.Count > 0:
                     self._acad_doc = self._acad.ActiveDocument
                     self._acad_model = self._acad_doc.ModelSpace
-                    self._is_initialized = True
+                    self.is_connected = True
                     return True
             except Exception:
                 pass
 
             return False
 
+    def _obter_entidade(self, handle: str) -> Optional[Any]:
+        """
+        Obtém a entidade BlockReference pelo handle.
+
+        Consulta primeiro o índice montado em listar_blocos_suporte (O(1), sem
+        tráfego COM) e só percorre o ModelSpace se o handle não estiver indexado.
+
+        Args:
+            handle: Handle do bloco
+
+        Returns:
+            Entidade COM ou None se não encontrada
+        """
+        entity = self._entidades_por_handle.get(handle)
+        if entity is not None:
+            return entity
+
+        count = self._acad_model.Count
+        for i in range(count):
+            try:
+                entity = self._acad_model.Item(i)
+                if entity.EntityName == self.BLOCK_REFERENCE and entity.Handle == handle:
+                    self._entidades_por_handle[handle] = entity
+                    return entity
+            except Exception:
+                continue
+        return None
+
     def desconectar(self) -> None:
         """Limpa as referências do AutoCAD (não fecha o aplicativo)."""
         self._cleanup()
@@ -197,17 +237,19 @@ class AutocadCOMConnector:
         """
         # Garante conexão válida (tentando reconectar se necessário)
         if not self._ensure_valid_connection():
-            print("[DEBUG] listar_blocos_suporte: Conexão inválida")
+            logger.debug("listar_blocos_suporte: Conexão inválida")
             return []
 
         blocos = []
+        self._entidades_por_handle.clear()
 
         try:
             def collect_blocks():
                 result = []
                 # No AutoCAD COM, precisamos usar o Count e Item para iterar
                 count = self._acad_model.Count
-                print(f"[DEBUG] Iterando {count} entidades no ModelSpace (filtro: {prefixo_bloco}*)...")
+                depurar = logger.isEnabledFor(logging.DEBUG)
+                logger.debug("Iterando %s entidades no ModelSpace (filtro: %s*)...", count, prefixo_bloco)
 
                 # Contadores para estatísticas
                 skips = {
@@ -221,14 +263,14 @@ class AutocadCOMConnector:
 
                 for i in range(count):
                     # Mostra progresso mais frequente para conjuntos pequenos
-                    if i % 10 == 0 or i == count - 1:
-                        print(f"[DEBUG] Processando entidade {i}/{count} ({len(result)} suportes encontrados)")
+                    if depurar and (i % 10 == 0 or i == count - 1):
+                        logger.debug("Processando entidade %s/%s (%s suportes encontrados)", i, count, len(result))
 
                     try:
                         entity = self._acad_model.Item(i)
 
                         # FILTRO 1: Primeiro verifica se é BlockReference (skip rápido)
-                        if entity.EntityName != 'AcDbBlockReference':
+                        if entity.EntityName != self.BLOCK_REFERENCE:
                             skips['not_block_ref'] += 1
                             continue
 
@@ -239,13 +281,13 @@ class AutocadCOMConnector:
                         # FILTRO 2: Verifica prefixo do nome ANTES de verificar atributos
                         if not entity_name.startswith(prefixo_bloco):
                             skips['wrong_prefix'] += 1
-                            print(f"[DEBUG] SKIP (prefixo): Handle={entity_handle}, Nome='{entity_name}' não começa com '{prefixo_bloco}'")
+                            logger.debug("SKIP (prefixo): Handle=%s, Nome='%s' não começa com '%s'", entity_handle, entity_name, prefixo_bloco)
                             continue
 
                         # FILTRO 3: Só então verifica atributos
                         if not entity.HasAttributes:
                             skips['no_attributes'] += 1
-                            print(f"[DEBUG] SKIP (sem atributos): Handle={entity_handle}, Nome='{entity_name}' não tem atributos")
+                            logger.debug("SKIP (sem atributos): Handle=%s, Nome='%s' não tem atributos", entity_handle, entity_name)
                             continue
 
                         # Busca atributo POSICAO
@@ -258,13 +300,16 @@ class AutocadCOMConnector:
 
                         if not tag_suporte:
                             skips['no_position_attr'] += 1
-                            # Lista todos os atributos disponíveis para debug
-                            attr_tags = [a.TagString for a in attribs]
-                            print(f"[DEBUG] SKIP (sem POSICAO): Handle={entity_handle}, Nome='{entity_name}', Atributos=[{', '.join(attr_tags)}]")
+                            if depurar:
+                                # Lista todos os atributos disponíveis para debug (leitura COM extra)
+                                attr_tags = [a.TagString for a in attribs]
+                                logger.debug("SKIP (sem POSICAO): Handle=%s, Nome='%s', Atributos=[%s]", entity_handle, entity_name, ', '.join(attr_tags))
                             continue
 
                         skips['success'] += 1
-                        print(f"[DEBUG] OK: Handle={entity_handle}, Nome='{entity_name}', POSICAO='{tag_suporte}'")
+                        logger.debug("OK: Handle=%s, Nome='%s', POSICAO='%s'", entity_handle, entity_name, tag_suporte)
+
+                        self._entidades_por_handle[entity_handle] = entity
 
                         insertion_point = entity.InsertionPoint
                         result.append({
@@ -279,19 +324,19 @@ class AutocadCOMConnector:
                         })
                     except Exception as e:
                         skips['exceptions'] += 1
-                        print(f"[DEBUG] EXCEÇÃO na entidade {i}: {e}")
+                        logger.debug("EXCEÇÃO na entidade %s: %s", i, e)
                         continue
 
                 # Resumo estatístico
-                print(f"[DEBUG] === RESUMO ===")
-                print(f"[DEBUG] Total entidades: {count}")
-                print(f"[DEBUG] Suportes encontrados: {skips['success']}")
-                print(f"[DEBUG] Skips (não é bloco): {skips['not_block_ref']}")
-                print(f"[DEBUG] Skips (prefixo errado): {skips['wrong_prefix']}")
-                print(f"[DEBUG] Skips (sem atributos): {skips['no_attributes']}")
-                print(f"[DEBUG] Skips (sem POSICAO): {skips['no_position_attr']}")
-                print(f"[DEBUG] Exceções: {skips['exceptions']}")
-                print(f"[DEBUG] Iteração concluída: {len(result)} suportes encontrados")
+                logger.debug("=== RESUMO ===")
+                logger.debug("Total entidades: %s", count)
+                logger.debug("Suportes encontrados: %s", skips['success'])
+                logger.debug("Skips (não é bloco): %s", skips['not_block_ref'])
+                logger.debug("Skips (prefixo errado): %s", skips['wrong_prefix'])
+                logger.debug("Skips (sem atributos): %s", skips['no_attributes'])
+                logger.debug("Skips (sem POSICAO): %s", skips['no_position_attr'])
+                logger.debug("Exceções: %s", skips['exceptions'])
+                logger.debug("Iteração concluída: %s suportes encontrados", len(result))
                 return result
 
             blocos = execute_with_retry(collect_blocks, "Listar blocos de suporte")
@@ -313,41 +358,20 @@ class AutocadCOMConnector:
         """
         # Garante conexão válida
         if not self._ensure_valid_connection():
-            print(f"[DEBUG] obter_propriedades_bloco({handle}): Conexão inválida")
+            logger.debug("obter_propriedades_bloco(%s): Conexão inválida", handle)
             return {}
 
         propriedades = {}
 
         try:
             def get_props():
-                print(f"[DEBUG] Buscando propriedades para handle {handle}...")
-                count = self._acad_model.Count
-                for i in range(count):
-                    try:
-                        entity = self._acad_model.Item(i)
-                        if entity.EntityName == 'AcDbBlockReference' and entity.Handle == handle:
-                            if entity.IsDynamicBlock:
-                                props = {}
-                                dyn_props = entity.GetDynamicBlockProperties()
-                                for dyn_prop in dyn_props:
-                                    if dyn_prop.PropertyName != "Origin":
-                                        valor = dyn_prop.Value
-                                        props[dyn_prop.PropertyName] = {
-                                            'valor': valor,
-                                            'show': dyn_prop.Show,
-                                            'readonly': not getattr(dyn_prop, 'ReadOnly', False)
-                                        }
-
-                                        # Obtém limites se existirem
-                                        if hasattr(dyn_prop, 'ValueMinimum'):
-                                            props[dyn_prop.PropertyName]['min'] = dyn_prop.ValueMinimum
-                                        if hasattr(dyn_prop, 'ValueMaximum'):
-                                            props[dyn_prop.PropertyName]['max'] = dyn_prop.ValueMaximum
-                                print(f"[DEBUG] Propriedades encontradas: {len(props)}")
-                                return props
-                    except Exception:
-                        continue
-                print(f"[DEBUG] Nenhuma propriedade encontrada para handle {handle}")
+                logger.debug("Buscando propriedades para handle %s...", handle)
+                entity = self._obter_entidade(handle)
+                if entity is not None and entity.IsDynamicBlock:
+                    props = self._ler_propriedades_dinamicas(entity)
+                    logger.debug("Propriedades encontradas: %s", len(props))
+                    return props
+                logger.debug("Nenhuma propriedade encontrada para handle %s", handle)
                 return {}
 
             propriedades = execute_with_retry(get_props, f"Obter propriedades do bloco {handle}")
@@ -357,6 +381,140 @@ class AutocadCOMConnector:
 
         return propriedades
 
+    def _ler_se_dinamico(self, entity: Any) -> Optional[Dict[str, Any]]:
+        """Lê as propriedades dinâmicas da entidade, ou None se o bloco não for dinâmico."""
+        if entity.IsDynamicBlock:
+            return self._ler_propriedades_dinamicas(entity)
+        return None
+
+    def _reler_entidade(self, handle: str, erro: Exception) -> Optional[Dict[str, Any]]:
+        """
+        Trata uma entidade do índice que falhou na leitura (ex: apagada após a listagem).
+
+        Remove o handle do índice e procura a entidade de novo no ModelSpace;
+        se não existir mais (ou falhar de novo), o bloco é ignorado.
+
+        Args:
+            handle: Handle do bloco
+            erro: Exceção da primeira leitura
+
+        Returns:
+            Propriedades do bloco ou None
+        """
+        logger.debug("Entidade %s inválida no índice (%s); procurando de novo", handle, erro)
+        self._entidades_por_handle.pop(handle, None)
+        entity = self._obter_entidade(handle)
+        if entity is None:
+            return None
+        try:
+            return self._ler_se_dinamico(entity)
+        except Exception as e:
+            logger.debug("Bloco %s ignorado: %s", handle, e)
+            self._entidades_por_handle.pop(handle, None)
+            return None
+
+    def obter_propriedades_blocos(self, handles: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Obtém propriedades dinâmicas de vários blocos em uma única operação.
+
+        Handles já indexados por listar_blocos_suporte são resolvidos direto;
+        os demais são procurados em uma só passada pelo ModelSpace.
+
+        Args:
+            handles: Handles dos blocos
+
+        Returns:
+            Dicionário handle -> propriedades (mesmo formato de obter_propriedades_bloco)
+        """
+        if not handles:
+            return {}
+
+        # Garante conexão válida
+        if not self._ensure_valid_connection():
+            logger.debug("obter_propriedades_blocos: Conexão inválida")
+            return {}
+
+        resultado = {}
+
+        try:
+            def get_all_props():
+                entidades = {}
+                faltando = set()
+                for handle in handles:
+                    entity = self._entidades_por_handle.get(handle)
+                    if entity is not None:
+                        entidades[handle] = entity
+                    else:
+                        faltando.add(handle)
+
+                if faltando:
+                    for i in range(self._acad_model.Count):
+                        try:
+                            entity = self._acad_model.Item(i)
+                            if entity.EntityName != self.BLOCK_REFERENCE:
+                                continue
+                            entity_handle = entity.Handle
+                            if entity_handle in faltando:
+                                self._entidades_por_handle[entity_handle] = entity
+                                entidades[entity_handle] = entity
+                                faltando.discard(entity_handle)
+                                if not faltando:
+                                    break
+                        except Exception:
+                            continue
+
+                props_por_handle = {}
+                for handle, entity in entidades.items():
+                    try:
+                        props = self._ler_se_dinamico(entity)
+                    except pythoncom.com_error as e:
+                        # AutoCAD ocupado: propaga para o retry refazer a leitura
+                        if e.hresult in self._HRESULTS_RECUPERAVEIS:
+                            raise
+                        props = self._reler_entidade(handle, e)
+                    except Exception as e:
+                        props = self._reler_entidade(handle, e)
+                    if props is not None:
+                        props_por_handle[handle] = props
+                logger.debug("Propriedades lidas para %s/%s blocos", len(props_por_handle), len(handles))
+                return props_por_handle
+
+            resultado = execute_with_retry(get_all_props, "Obter propriedades dos blocos")
+
+        except Exception as e:
+            print(f"Erro ao obter propriedades: {e}")
+
+        return resultado
+
+    def _ler_propriedades_dinamicas(self, entity: Any) -> Dict[str, Any]:
+        """
+        Lê as propriedades dinâmicas de uma entidade (exceto 'Origin').
+
+        Args:
+            entity: BlockReference dinâmico
+
+        Returns:
+            Dicionário nome -> {'valor', 'show', 'readonly', 'min'?, 'max'?}
+        """
+        props = {}
+        for dyn_prop in entity.GetDynamicBlockProperties():
+            nome = dyn_prop.PropertyName
+            if nome == "Origin":
+                continue
+            dados = {
+                'valor': dyn_prop.Value,
+                'show': dyn_prop.Show,
+                'readonly': not getattr(dyn_prop, 'ReadOnly', False)
+            }
+
+            # Obtém limites se existirem
+            if hasattr(dyn_prop, 'ValueMinimum'):
+                dados['min'] = dyn_prop.ValueMinimum
+            if hasattr(dyn_prop, 'ValueMaximum'):
+                dados['max'] = dyn_prop.ValueMaximum
+            props[nome] = dados
+        return props
+
     def atualizar_propriedade(
         self,
         handle: str,
@@ -379,39 +537,72 @@ class AutocadCOMConnector:
             return False, "Não conectado ao AutoCAD"
 
         try:
-            def update_prop():
-                # Itera usando Item method
-                count = self._acad_model.Count
-                for i in range(count):
-                    try:
-                        entity = self._acad_model.Item(i)
-                        if entity.EntityName == 'AcDbBlockReference' and entity.Handle == handle:
-                            dyn_props = entity.GetDynamicBlockProperties()
-                            for prop in dyn_props:
-                                if prop.PropertyName == nome_propriedade:
-                                    # Verifica limites se existirem
-                                    if hasattr(prop, 'ValueMinimum') and hasattr(prop, 'ValueMaximum'):
-                                        try:
-                                            valor_num = float(novo_valor)
-                                            if not (prop.ValueMinimum <= valor_num <= prop.ValueMaximum):
-                                                return False, (
-                                                    f"Valor {novo_valor} fora dos limites "
-                                                    f"[{prop.ValueMinimum}, {prop.ValueMaximum}]"
-                                                )
-                                        except (ValueError, TypeError):
-                                            pass
-
-                                    prop.Value = novo_valor
-                                    return True, "Propriedade atualizada com sucesso"
-                    except Exception:
-                        continue
-                return False, "Bloco ou propriedade não encontrada"
-
-            return execute_with_retry(update_prop, f"Atualizar propriedade {nome_propriedade}")
+            return execute_with_retry(
+                lambda: self._atualizar_entidade(handle, nome_propriedade, novo_valor),
+                f"Atualizar propriedade {nome_propriedade}"
+            )
 
         except Exception as e:
             return False, f"Erro ao atualizar: {str(e)}"
 
+    def atualizar_propriedades(
+        self,
+        handles: List[str],
+        nome_propriedade: str,
+        novo_valor: Any
+    ) -> List[Tuple[bool, str]]:
+        """
+        Atualiza a mesma propriedade dinâmica em vários blocos.
+
+        A conexão é validada uma única vez para o lote; cada bloco tem seu
+        próprio retry, e uma falha não interrompe os demais.
+
+        Args:
+            handles: Handles dos blocos
+            nome_propriedade: Nome da propriedade
+            novo_valor: Novo valor
+
+        Returns:
+            Lista de tuplas (sucesso, mensagem), na ordem de handles
+        """
+        if not self._ensure_valid_connection():
+            return [(False, "Não conectado ao AutoCAD")] * len(handles)
+
+        resultados = []
+        for handle in handles:
+            try:
+                resultados.append(execute_with_retry(
+                    lambda: self._atualizar_entidade(handle, nome_propriedade, novo_valor),
+                    f"Atualizar propriedade {nome_propriedade}"
+                ))
+            except Exception as e:
+                resultados.append((False, f"Erro ao atualizar: {str(e)}"))
+        return resultados
+
+    def _atualizar_entidade(self, handle: str, nome_propriedade: str, novo_valor: Any) -> Tuple[bool, str]:
+        """Aplica o novo valor na propriedade dinâmica do bloco (sem retry)."""
+        entity = self._obter_entidade(handle)
+        if entity is None:
+            return False, "Bloco ou propriedade não encontrada"
+        dyn_props = entity.GetDynamicBlockProperties()
+        for prop in dyn_props:
+            if prop.PropertyName == nome_propriedade:
+                # Verifica limites se existirem
+                if hasattr(prop, 'ValueMinimum') and hasattr(prop, 'ValueMaximum'):
+                    try:
+                        valor_num = float(novo_valor)
+                        if not (prop.ValueMinimum <= valor_num <= prop.ValueMaximum):
+                            return False, (
+                                f"Valor {novo_valor} fora dos limites "
+                                f"[{prop.ValueMinimum}, {prop.ValueMaximum}]"
+                            )
+                    except (ValueError, TypeError):
+                        pass
+
+                prop.Value = novo_valor
+                return True, "Propriedade atualizada com sucesso"
+        return False, "Bloco ou propriedade não encontrada"
+
     def zoom_para_ponto(self, x: float, y: float, z: float, margem: float = 200) -> bool:
         """
         Faz zoom para um ponto específico.
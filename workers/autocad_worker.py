@@ -85,7 +85,10 @@ class LoadSuportesWorker(QThread):
 
             # Carrega suportes básicos
             print("[DEBUG] Chamando listar_todos()...")
-            suportes = self._repository.listar_todos(forcar_recarga=self._forcar_recarga)
+            suportes = self._repository.listar_todos(
+                forcar_recarga=self._forcar_recarga,
+                carregar_propriedades=False
+            )
             print(f"[DEBUG] listar_todos() retornou {len(suportes)} suportes")
 
             self.progress.emit(50)
@@ -94,30 +97,11 @@ class LoadSuportesWorker(QThread):
                 self.status.emit("Carregamento cancelado")
                 return
 
-            # Carrega propriedades dinâmicas se solicitado
+            # Carrega propriedades dinâmicas se solicitado (uma única leitura em lote)
             if self._carregar_propriedades:
-                total = len(suportes)
-                print(f"[DEBUG] Carregando propriedades de {total} suportes...")
-                for i, suporte in enumerate(suportes):
-                    if self._cancelado:
-                        break
-
-                    # Progresso a cada 10 suportes
-                    if i % 10 == 0:
-                        print(f"[DEBUG] Progresso propriedades: {i+1}/{total}")
-
-                    # Carrega propriedades do bloco
-                    props = self._repository.obter_propriedades(suporte.handle)
-                    if props:
-                        for nome, dados in props.items():
-                            if isinstance(dados, dict):
-                                suporte.definir_propriedade(nome, dados.get('valor'))
-                            else:
-                                suporte.definir_propriedade(nome, dados)
-
-                    percentual = 50 + int((i + 1) / total * 50)
-                    self.progress.emit(percentual)
-                    self.status.emit(f"Carregando propriedades... {i + 1}/{total}")
+                print(f"[DEBUG] Carregando propriedades de {len(suportes)} suportes...")
+                self.status.emit("Carregando propriedades...")
+                self._repository.precarregar_propriedades()
 
             if self._cancelado:
                 self.status.emit("Carregamento cancelado")